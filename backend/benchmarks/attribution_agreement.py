@@ -0,0 +1,92 @@
+"""
+Approximate vs exact SHAP agreement benchmark.
+Explains N dataset rows with TreeExplainer and with the flattened forest's
+path attributions, then reports per-row cost and how closely the
+approximate rankings track exact SHAP.
+
+Usage (from backend/):
+    python -m benchmarks.attribution_agreement --rows 500
+"""
+
+import argparse
+import json
+import time
+import numpy as np
+from scipy.stats import spearmanr
+from services.dataset import CACHE_DIR, TransactionDataset, build_cache, cache_is_current, find_source
+from services.explainer import ShapExplainer
+
+
+def _timed(fn, X: np.ndarray, repeat: int) -> tuple[np.ndarray, float]:
+    """Run fn on X `repeat` times; return the last result and the best per-row time (ms)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(X)
+        best = min(best, time.perf_counter() - start)
+    return result, best / len(X) * 1e3
+
+
+def agreement(exact: np.ndarray, approx: np.ndarray, k: int = 5) -> dict:
+    """Rank agreement between two (n_rows, n_features) attribution matrices."""
+    exact_mag, approx_mag = np.abs(exact), np.abs(approx)
+    spearman = [spearmanr(e, a).statistic for e, a in zip(exact_mag, approx_mag)]
+    exact_top = np.argsort(-exact_mag, axis=1)[:, :k]
+    approx_top = np.argsort(-approx_mag, axis=1)[:, :k]
+    overlap = [len(set(e) & set(a)) / k for e, a in zip(exact_top, approx_top)]
+    # Sign agreement on each row's exact top-k features
+    signs = np.sign(np.take_along_axis(exact, exact_top, axis=1)) == np.sign(np.take_along_axis(approx, exact_top, axis=1))
+    return {
+        "spearman_mean": round(float(np.nanmean(spearman)), 4),
+        "top1_agreement": round(float(np.mean(exact_top[:, 0] == approx_top[:, 0])), 4),
+        f"top{k}_overlap": round(float(np.mean(overlap)), 4),
+        f"top{k}_sign_agreement": round(float(signs.mean()), 4),
+    }
+
+
+def run(rows: int, repeat: int, seed: int) -> dict:
+    source = find_source()
+    if source is not None and not cache_is_current(source):
+        build_cache(source)
+    dataset, _ = TransactionDataset.open(CACHE_DIR)
+    explainer = ShapExplainer()
+
+    rng = np.random.default_rng(seed)
+    idx = np.sort(rng.choice(len(dataset), size=min(rows, len(dataset)), replace=False))
+    X = np.asarray(dataset.features[idx])
+
+    exact, exact_ms = _timed(lambda x: np.asarray(explainer.explainer.shap_values(x), dtype=np.float64), X, repeat)
+    approx, approx_ms = _timed(explainer.forest.path_contributions, X, repeat)
+    _, single_ms = _timed(lambda x: [explainer.forest.path_contributions(r[None]) for r in x], X[:100], repeat)
+
+    exact_base = float(np.ravel(explainer.explainer.expected_value)[0])
+    return {
+        "rows": len(X),
+        "exact_ms_per_row": round(exact_ms, 4),
+        "approx_ms_per_row": round(approx_ms, 4),
+        "approx_single_row_ms": round(single_ms, 4),
+        "speedup": round(exact_ms / approx_ms, 1),
+        "base_value_diff": abs(exact_base - explainer.forest.expected_value),
+        "prediction_max_diff": float(np.abs((exact_base + exact.sum(1)) - (explainer.forest.expected_value + approx.sum(1))).max()),
+        **agreement(exact, approx),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = run(args.rows, args.repeat, args.seed)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""
+FraudPulse benchmark suite.
+Times the scoring, explain and streaming hot paths against the bundled
+sample dataset and the shipped model files, fully offline (the LLM is a
+local stub that streams canned chunks):
+
+  predict_single      FraudPredictor.predict, one row per call
+  predict_batch_<n>   FraudPredictor.predict_batch on n-row batches
+  explain_single      ShapExplainer.explain (exact TreeExplainer)
+  explain_approx      ShapExplainer.explain_batch(approximate=True), one row
+  api_transactions    GET /api/transactions pages
+  api_poll            GET /api/poll/transactions on a filled ring buffer
+  api_explain         GET /api/explain/{id} SSE stream (stub LLM, cold cache)
+  ws_fanout           one published transaction delivered to N WebSocket clients
+  ws_encode_<enc>     framing a batch of live transactions for N clients
+                      (legacy = per-client send_json; json, json-batch, binary
+                      = services.wire, encoded once and shared), with bytes/tx
+
+Each result reports p50/p95/p99/mean latency in ms and rows (or
+messages) per second. Reports are JSON; --baseline compares against an
+earlier report and flags p50 regressions beyond --tolerance.
+
+Usage (from backend/):
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --baseline bench.json --fail-on-regression
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import platform
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SAMPLE_CSV = BACKEND_DIR / "data" / "creditcard_sample.csv"
+BENCH_CACHE_DIR = BACKEND_DIR / "data" / "cache" / "bench"
+
+
+def configure_environment():
+    """Pin the app to the sample CSV, a private cache and no network. Must run before importing services."""
+    os.environ["DATASET_PATH"] = str(SAMPLE_CSV)
+    os.environ["DATASET_CACHE_DIR"] = str(BENCH_CACHE_DIR)
+    os.environ["MAX_ROWS"] = "0"
+    os.environ["GEMINI_API_KEY"] = ""
+    os.environ["SHAP_PRECOMPUTE"] = "0"
+
+
+# ── Measurement ───────────────────────────────────────────────
+
+def summarize(latencies: list[float], rows_per_call: int = 1, wall: float | None = None) -> dict:
+    """Latency percentiles (ms) and throughput for a list of per-call seconds."""
+    lat = np.asarray(latencies, dtype=np.float64)
+    total = wall if wall is not None else lat.sum()
+    p50, p95, p99 = np.percentile(lat, [50, 95, 99]) * 1e3
+    return {
+        "n": len(lat),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "mean_ms": round(float(lat.mean() * 1e3), 4),
+        "rows_per_s": round(len(lat) * rows_per_call / total, 1) if total > 0 else None,
+    }
+
+
+def time_calls(fn, args: list, warmup: int = 5) -> list[float]:
+    for a in args[:warmup]:
+        fn(a)
+    latencies = []
+    for a in args:
+        start = time.perf_counter()
+        fn(a)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+# ── Stub LLM ──────────────────────────────────────────────────
+
+class StubModels:
+    """Stands in for client.aio.models: streams canned chunks with a fixed delay."""
+
+    def __init__(self, chunks: int, delay: float):
+        self.chunks = chunks
+        self.delay = delay
+
+    async def generate_content_stream(self, model, contents, config):
+        async def stream():
+            for i in range(self.chunks):
+                await asyncio.sleep(self.delay)
+                yield SimpleNamespace(text=f"token{i} ")
+        return stream()
+
+
+def stub_client(chunks: int = 40, delay: float = 0.002):
+    return SimpleNamespace(aio=SimpleNamespace(models=StubModels(chunks, delay)))
+
+
+# ── Model benchmarks ──────────────────────────────────────────
+
+def bench_models(args, dataset, predictor, explainer) -> dict:
+    rng = np.random.default_rng(args.seed)
+    results = {}
+
+    idx = rng.integers(0, len(dataset), size=args.single_rows)
+    rows = [np.asarray(dataset.features[i]) for i in idx]
+    results["predict_single"] = summarize(time_calls(predictor.predict, rows))
+
+    for size in args.batch_sizes:
+        size = min(size, len(dataset))
+        starts = rng.integers(0, len(dataset) - size + 1, size=args.batch_repeats)
+        batches = [np.asarray(dataset.features[s:s + size]) for s in starts]
+        results[f"predict_batch_{size}"] = summarize(time_calls(predictor.predict_batch, batches, warmup=1), size)
+
+    shap_rows = rows[:args.explain_rows]
+    results["explain_single"] = summarize(time_calls(explainer.explain, shap_rows, warmup=2))
+    results["explain_approx"] = summarize(time_calls(
+        lambda r: explainer.explain_batch(r.reshape(1, -1), approximate=True), shap_rows,
+    ))
+    return results
+
+
+# ── Server benchmarks ─────────────────────────────────────────
+
+class ServerThread:
+    """Runs the FastAPI app under uvicorn on its own thread and event loop."""
+
+    def __init__(self, app):
+        import uvicorn
+
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning", ws="websockets")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.loop: asyncio.AbstractEventLoop | None = None
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+    def call(self, fn, *args):
+        """Run fn(*args) on the server loop and wait for the result."""
+        async def run():
+            return fn(*args)
+        return asyncio.run_coroutine_threadsafe(run(), self.loop).result()
+
+
+async def bench_http(base: str, paths: list[str], concurrency: int) -> tuple[list[float], float]:
+    import httpx
+
+    latencies: list[float] = []
+    queue = list(reversed(paths))
+    async with httpx.AsyncClient(base_url=base, timeout=30) as client:
+        async def worker():
+            while queue:
+                path = queue.pop()
+                start = time.perf_counter()
+                response = await client.get(path)
+                await response.aread()
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        for path in paths[:5]:
+            await client.get(path)  # warm-up
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        return latencies, time.perf_counter() - start
+
+
+async def bench_ws_fanout(server: ServerThread, hub, clients: int, messages: int, interval: float) -> dict:
+    import websockets
+
+    url = f"ws://127.0.0.1:{server.port}/ws/transactions"
+    latencies: list[float] = []
+    sockets = [await websockets.connect(url, max_size=None) for _ in range(clients)]
+
+    async def reader(ws):
+        received = 0
+        while received < messages:
+            tx = json.loads(await ws.recv())
+            sent = tx.get("bench_sent")
+            if sent is None:
+                continue  # regular producer traffic
+            latencies.append(time.perf_counter() - sent)
+            received += 1
+
+    readers = [asyncio.create_task(reader(ws)) for ws in sockets]
+    await asyncio.sleep(0.2)
+    template = server.call(lambda: dict(hub.streamer.get_buffered(0, 1)[-1]))
+    start = time.perf_counter()
+    for i in range(messages):
+        tx = {**template, "id": -(i + 1), "bench_sent": time.perf_counter()}
+        server.loop.call_soon_threadsafe(hub.publish, tx)
+        await asyncio.sleep(interval)
+    try:
+        await asyncio.wait_for(asyncio.gather(*readers), timeout=60)
+    finally:
+        wall = time.perf_counter() - start
+        for ws in sockets:
+            await ws.close()
+
+    result = summarize(latencies, wall=wall)
+    result["clients"] = clients
+    result["messages"] = messages
+    result["rows_per_s"] = round(len(latencies) / wall, 1)  # deliveries per second
+    return result
+
+
+def bench_server(args, app_module) -> dict:
+    from services import llm_service
+
+    llm_service.set_client(stub_client(args.llm_chunks, args.llm_delay))
+    results = {}
+    with ServerThread(app_module.app) as server:
+        server.loop = app_module.hub._task.get_loop()
+        base = f"http://127.0.0.1:{server.port}"
+        n_rows = len(app_module.dataset)
+        rng = np.random.default_rng(args.seed)
+
+        pages = rng.integers(1, max(n_rows // 50, 1) + 1, size=args.http_requests)
+        latencies, wall = asyncio.run(bench_http(
+            base, [f"/api/transactions?page={p}&limit=50" for p in pages], args.concurrency,
+        ))
+        results["api_transactions"] = {**summarize(latencies, 50, wall), "concurrency": args.concurrency}
+
+        # Fill the polling ring buffer so every poll returns a full page
+        server.call(lambda: [app_module.streamer.get_next_transaction() for _ in range(1000)])
+        since = rng.integers(0, 950, size=args.http_requests)
+        latencies, wall = asyncio.run(bench_http(
+            base, [f"/api/poll/transactions?since_id={s}&limit=50" for s in since], args.concurrency,
+        ))
+        results["api_poll"] = {**summarize(latencies, 50, wall), "concurrency": args.concurrency}
+
+        # Distinct ids so every request misses the explanation cache
+        ids = rng.choice(n_rows, size=min(args.explain_requests, n_rows), replace=False)
+        latencies, wall = asyncio.run(bench_http(
+            base, [f"/api/explain/{i}" for i in ids], args.concurrency,
+        ))
+        results["api_explain"] = {
+            **summarize(latencies, 1, wall), "concurrency": args.concurrency,
+            "stub_llm": {"chunks": args.llm_chunks, "delay_s": args.llm_delay},
+        }
+
+        results["ws_fanout"] = asyncio.run(bench_ws_fanout(
+            server, app_module.hub, args.ws_clients, args.ws_messages, args.ws_interval,
+        ))
+        txs = server.call(lambda: app_module.streamer.get_buffered(0, 1000))
+        results.update(bench_wire(txs, args.ws_clients, args.ws_batch))
+    return results
+
+
+def bench_wire(txs: list[dict], clients: int, batch: int) -> dict:
+    from services.wire import WireEncoder
+
+    batches = [txs[i:i + batch] for i in range(0, len(txs) - batch + 1, batch)]
+    results = {}
+
+    def legacy(frame):
+        return [json.dumps(tx, separators=(",", ":")) for tx in frame for _ in range(clients)]
+
+    results["ws_encode_legacy"] = summarize(time_calls(legacy, batches), batch)
+    results["ws_encode_legacy"]["bytes_per_tx"] = round(sum(map(len, legacy(txs))) / len(txs) / clients, 1)
+
+    for encoding in ("json", "json-batch", "binary"):
+        def encode(frame):
+            encoder = WireEncoder()  # cold: each transaction is encoded once, then shared
+            if encoding == "json":
+                return [encoder.frame([tx], encoding) for _ in range(clients) for tx in frame]
+            return [encoder.frame(frame, encoding) for _ in range(clients)]
+
+        frames = [f for b in batches for f in encode(b)]
+        results[f"ws_encode_{encoding}"] = {
+            **summarize(time_calls(encode, batches), batch),
+            "bytes_per_tx": round(sum(map(len, frames)) / (len(batches) * batch * clients), 1),
+        }
+    return results
+
+
+# ── Baseline comparison ───────────────────────────────────────
+
+def compare(current: dict, baseline: dict, tolerance: float) -> dict:
+    """Per-benchmark p50 / throughput ratios against a baseline report."""
+    comparison = {}
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        p50_ratio = result["p50_ms"] / base["p50_ms"] if base["p50_ms"] else None
+        rate_ratio = (
+            result["rows_per_s"] / base["rows_per_s"]
+            if result.get("rows_per_s") and base.get("rows_per_s") else None
+        )
+        comparison[name] = {
+            "p50_ms": [base["p50_ms"], result["p50_ms"]],
+            "p50_ratio": round(p50_ratio, 3) if p50_ratio else None,
+            "rows_per_s_ratio": round(rate_ratio, 3) if rate_ratio else None,
+            "regression": bool(p50_ratio and p50_ratio > 1 + tolerance),
+        }
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed p50 slowdown before flagging")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--only", choices=["models", "server"], help="run one group only")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--single-rows", type=int, default=1000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[64, 1024, 8192])
+    parser.add_argument("--batch-repeats", type=int, default=20)
+    parser.add_argument("--explain-rows", type=int, default=100)
+    parser.add_argument("--http-requests", type=int, default=500)
+    parser.add_argument("--explain-requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-chunks", type=int, default=40)
+    parser.add_argument("--llm-delay", type=float, default=0.002)
+    parser.add_argument("--ws-clients", type=int, default=50)
+    parser.add_argument("--ws-messages", type=int, default=100)
+    parser.add_argument("--ws-interval", type=float, default=0.01)
+    parser.add_argument("--ws-batch", type=int, default=16, help="transactions per frame for ws_encode_*")
+    args = parser.parse_args()
+
+    configure_environment()
+    sys.path.insert(0, str(BACKEND_DIR))
+    import main as app_module
+    from services.dataset import TransactionDataset, build_cache, cache_is_current, find_source
+    from services.predictor import FraudPredictor
+    from services.explainer import ShapExplainer
+
+    results = {}
+    if args.only != "server":
+        source = find_source()
+        if not cache_is_current(source, BENCH_CACHE_DIR):
+            build_cache(source, BENCH_CACHE_DIR)
+        dataset, _ = TransactionDataset.open(BENCH_CACHE_DIR)
+        results.update(bench_models(args, dataset, FraudPredictor(), ShapExplainer()))
+    if args.only != "models":
+        results.update(bench_server(args, app_module))
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "dataset": SAMPLE_CSV.name,
+        },
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "fail_on_regression")},
+        "results": results,
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(report, json.load(f), args.tolerance)
+        regressions = [name for name, c in report["comparison"].items() if c["regression"]]
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+    if regressions:
+        print(f"[!] p50 regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}", file=sys.stderr)
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
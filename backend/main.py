@@ -3,94 +3,143 @@ FraudPulse Backend — FastAPI Application
 AI-Powered Transaction Fraud Detection Dashboard
 """
 
-import json
-import asyncio
+import time
 import numpy as np
-import pandas as pd
-from pathlib import Path
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
 
 from schemas import (
     TransactionOut, PredictionResult, ShapResult, ShapValue,
-    StatsOut, StreamTransaction, RiskLevel,
+    StatsOut, QualityOut, StreamTransaction, RiskLevel, ShapBatchRequest,
 )
-from services.predictor import FraudPredictor
+from services.predictor import FraudPredictor, batch_to_records
 from services.explainer import ShapExplainer
 from services.streamer import TransactionStreamer
-from services.llm_service import stream_explanation
+from services.hub import StreamHub
+from services.batching import MicroBatcher
+from services.executor import ModelExecutor
+from services.shap_cache import ShapCache, ShapPrecomputer, SHAP_PRECOMPUTE
+from services.dataset import (
+    TransactionDataset, CACHE_DIR, TIME_COL, build_cache, cache_is_current, find_source, read_manifest,
+)
+from services.replay import ReplayEngine
+from services.drift import DriftMonitor, ensure_reference
+from services.llm_cache import ExplanationBroker
+from services.llm_scheduler import LLMScheduler
+from services.llm_service import generate_explanation
+from services.sse import sse_frames
+from services.wire import WireEncoder, ENCODINGS, WS_BATCH_MAX, WS_FRAMES, WS_BYTES, WS_TRANSACTIONS
+from services.metrics import REGISTRY, STAGE_SECONDS, STAGE_ROWS
+from services.serve import SERVE_WORKERS, FEED_NAME, LOCK_NAME, DRIFT_INBOX_NAME
+from services.shared_feed import SharedFeed, LeaderLock, SharedStream, SharedCounts
+from services.preprocessing import FeatureScaler, parse_batch_body
 
 # ── Global state ──
 predictor: FraudPredictor = None
 explainer: ShapExplainer = None
 streamer: TransactionStreamer = None
-df: pd.DataFrame = None
-feature_cols: list[str] = []
-
-# Maximum rows to keep in memory (saves RAM on Railway)
-MAX_ROWS = 20000
-
-DATA_DIR = Path(__file__).parent / "data"
-DATA_GZ = DATA_DIR / "creditcard.csv.gz"
-DATA_SAMPLE = DATA_DIR / "creditcard_sample.csv"
+# Read side of the live feed: the streamer itself, or a SharedStream across workers
+stream_source = None
+shared_stream: SharedStream = None
+hub: StreamHub = None
+shap_batcher: MicroBatcher = None
+model_executor: ModelExecutor = None
+shap_cache = ShapCache()
+shap_precomputer: ShapPrecomputer = None
+drift_monitor: DriftMonitor = None
+# Bounded, CRITICAL-first upstream LLM streams with deadlines
+llm_scheduler = LLMScheduler(generate_explanation)
+# Finished LLM explanations + single-flight dedup of concurrent requests
+llm_broker = ExplanationBroker(generate=llm_scheduler.stream)
+# Each live transaction is serialized once for all WebSocket subscribers
+wire_encoder = WireEncoder()
+dataset: TransactionDataset = None
+scaler: FeatureScaler = None
+
+# Maximum transactions accepted by a single /api/score/batch call
+MAX_BATCH_ROWS = 50000
+# Maximum /api/score/batch body, enforced before parsing (~40 bytes per JSON number)
+MAX_BATCH_BYTES = MAX_BATCH_ROWS * 30 * 40
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Load models and data on startup."""
-    global predictor, explainer, streamer, df, feature_cols
+    global predictor, explainer, streamer, stream_source, shared_stream, hub, shap_batcher, shap_precomputer, dataset, scaler
+    global model_executor, drift_monitor
 
     print("[*] FraudPulse starting up...")
 
-    # Load dataset — prefer full gzip, fallback to sample
-    data_path = DATA_GZ if DATA_GZ.exists() else DATA_SAMPLE if DATA_SAMPLE.exists() else None
-
-    if data_path is None:
-        print("[!] No dataset found in data/")
-    else:
-        try:
-            import gc
-            from sklearn.preprocessing import StandardScaler
-
-            compression = "gzip" if str(data_path).endswith(".gz") else None
-            full_df = pd.read_csv(data_path, compression=compression)
-            total_rows = len(full_df)
-
-            # Sample to stay within memory limits if dataset is large
-            if total_rows > MAX_ROWS:
-                fraud_df = full_df[full_df["Class"] == 1]
-                legit_df = full_df[full_df["Class"] == 0]
-                legit_sample = legit_df.sample(
-                    n=min(MAX_ROWS - len(fraud_df), len(legit_df)),
-                    random_state=42,
-                )
-                df = pd.concat([legit_sample, fraud_df]).sample(frac=1, random_state=42).reset_index(drop=True)
-                del full_df, fraud_df, legit_df, legit_sample
-                gc.collect()
-            else:
-                df = full_df
-
-            # Preserve original Amount for display (before scaling)
-            df["Amount_Original"] = df["Amount"].copy()
-
-            scaler = StandardScaler()
-            df["Amount"] = scaler.fit_transform(df[["Amount"]])
-            df["Time"] = scaler.fit_transform(df[["Time"]])
-            feature_cols = [c for c in df.columns if c not in ("Class", "Amount_Original")]
-            print(f"[*] Dataset loaded: {len(df)} rows (from {total_rows} total)")
-        except Exception as e:
-            print(f"[!] Failed to load dataset: {e}")
-            df = None
+    # Open the memory-mapped dataset cache, converting the raw CSV on first boot
+    data_path = find_source()
+    try:
+        if data_path is not None and not cache_is_current(data_path):
+            print(f"[*] Building dataset cache from {data_path.name}...")
+            build_cache(data_path)
+
+        if read_manifest() is None:
+            print("[!] No dataset found in data/")
+        else:
+            dataset, scaler = TransactionDataset.open()
+            print(f"[*] Dataset loaded: {len(dataset)} rows (memory-mapped from {CACHE_DIR})")
+    except Exception as e:
+        print(f"[!] Failed to load dataset: {e}")
+        dataset = None
 
     # Load models
     try:
-        predictor = FraudPredictor()
-        explainer = ShapExplainer()
-        if df is not None:
-            streamer = TransactionStreamer(df, predictor)
+        # Flattened forest is memory-mapped from the cache, shared by every worker
+        predictor = FraudPredictor(cache_dir=CACHE_DIR)
+        explainer = ShapExplainer(forest=predictor.forest)
+        # All model work after startup runs on a sized pool, never on the event loop
+        model_executor = ModelExecutor(
+            {"predict_batch": predictor.predict_batch, "explain_batch": explainer.explain_batch},
+            cache_dir=CACHE_DIR,
+        )
+        if dataset is not None:
+            await model_executor.warm_up(dataset.features[:1])
+        # Concurrent /api/shap and /api/explain calls share one TreeExplainer call off the event loop
+        shap_batcher = MicroBatcher(model_executor.bind("explain_batch"))
+        if dataset is not None:
+            # The resident dataset is immutable — score every row once, reuse across boots
+            if not dataset.load_predictions(CACHE_DIR, predictor.fingerprint):
+                dataset.predictions = predictor.predict_all(dataset.features)
+                print(f"[*] Precomputed predictions for {len(dataset)} rows")
+                try:
+                    dataset.save_predictions(CACHE_DIR, predictor.fingerprint)
+                except OSError as e:
+                    print(f"[!] Could not cache predictions: {e}")
+            # Live features and scores vs the training distribution, scored on a schedule
+            drift_monitor = DriftMonitor(ensure_reference(dataset, CACHE_DIR, predictor.fingerprint))
+            drift_monitor.start()
+            # Pacing from REPLAY_* (demo trickle by default); time-warp needs Time in seconds
+            replay = ReplayEngine(time_scale=float(scaler.scale[TIME_COL]))
+            streamer = TransactionStreamer(
+                dataset, predictor, explainer=explainer, replay=replay, drift=drift_monitor,
+                executor=model_executor,
+            )
+            print(f"[*] Replay: {replay.mode} ({replay.profile_spec})")
+            # One producer scores each transaction once and fans it out to all clients
+            hub = StreamHub(streamer)
+            if SERVE_WORKERS > 1:
+                # Exactly one worker produces; the others mirror its shared-memory feed
+                feed = SharedFeed(CACHE_DIR / FEED_NAME, streamer.buffer.capacity)
+                shared_stream = SharedStream(hub, feed, LeaderLock(CACHE_DIR / LOCK_NAME))
+                # Every worker's drift counts (live feed and /api/score/batch) go to the leader
+                drift_monitor.inbox = SharedCounts(CACHE_DIR / DRIFT_INBOX_NAME, drift_monitor.n_counts)
+                drift_monitor.evaluates = lambda: shared_stream.is_leader
+                shared_stream.start()
+                stream_source = shared_stream
+            else:
+                hub.start()
+                stream_source = streamer
+            if SHAP_PRECOMPUTE:
+                # Warm the SHAP cache for flagged transactions before analysts click them
+                shap_precomputer = ShapPrecomputer(hub, dataset, model_executor, shap_cache)
+                shap_precomputer.start()
         print("[✓] All services initialized")
     except Exception as e:
         print(f"[!] Failed to load models: {e}")
@@ -99,6 +148,18 @@ async def lifespan(app: FastAPI):
     yield
 
     print("[*] FraudPulse shutting down...")
+    if drift_monitor is not None:
+        await drift_monitor.stop()
+    if shap_precomputer is not None:
+        await shap_precomputer.stop()
+    if shared_stream is not None:
+        await shared_stream.stop()
+    if hub is not None:
+        await hub.stop()
+    if shap_batcher is not None:
+        await shap_batcher.stop()
+    if model_executor is not None:
+        model_executor.shutdown()
 
 
 app = FastAPI(
@@ -117,6 +178,15 @@ app.add_middleware(
 )
 
 
+async def explain_row(idx: int) -> dict:
+    """SHAP explanation for a dataset row, served from the LRU cache when possible."""
+    result = shap_cache.get(idx)
+    if result is None:
+        result = await shap_batcher.submit(dataset.row(idx))
+        shap_cache.put(idx, result)
+    return result
+
+
 # ── Health check ──────────────────────────────────────────────
 
 @app.get("/")
@@ -129,22 +199,103 @@ async def health():
     return {
         "status": "ok",
         "models_loaded": predictor is not None,
-        "data_loaded": df is not None,
+        "data_loaded": dataset is not None,
+        "shap_cache": shap_cache.stats(),
+        "llm_cache": llm_broker.stats(),
+        "llm_scheduler": llm_scheduler.stats(),
+        "model_executor": model_executor.stats() if model_executor else None,
+        "replay": replay_stats(),
     }
 
 
+def replay_stats() -> dict | None:
+    """Pacing of the local producer (None on workers following another's feed)."""
+    if streamer is None or (shared_stream is not None and not shared_stream.is_leader):
+        return None
+    return streamer.replay.stats()
+
+
+def drift_report() -> dict | None:
+    """Latest drift report; workers following another's feed serve the leader's."""
+    if shared_stream is not None and not shared_stream.is_leader:
+        return shared_stream.get_drift_report()
+    return drift_monitor.report if drift_monitor else None
+
+
+def drift_scores(key: str) -> dict | None:
+    report = drift_report()
+    if not report or not report["columns"]:
+        return None
+    return {name: column[key] for name, column in report["columns"].items()}
+
+
+# ── Metrics ───────────────────────────────────────────────────
+
+# State owned by other objects is read at scrape time
+REGISTRY.callback("fraudpulse_stream_subscribers", "Connected WebSocket subscribers",
+                  lambda: hub.subscriber_count if hub else None)
+REGISTRY.callback("fraudpulse_stream_buffer_occupancy", "Transactions held in the polling ring buffer",
+                  lambda: len(streamer.buffer) if streamer else None)
+REGISTRY.callback("fraudpulse_stream_dropped_total", "Transactions dropped for slow subscribers",
+                  lambda: sum(sub.dropped for sub in hub.subscribers) if hub else None, kind="counter")
+REGISTRY.callback("fraudpulse_cache_hits_total", "Cache hits", kind="counter", labels=("cache",),
+                  fn=lambda: {"shap": shap_cache.hits, "llm": llm_broker.cache.hits})
+REGISTRY.callback("fraudpulse_cache_misses_total", "Cache misses", kind="counter", labels=("cache",),
+                  fn=lambda: {"shap": shap_cache.misses, "llm": llm_broker.cache.misses})
+REGISTRY.callback("fraudpulse_cache_entries", "Entries held per cache", labels=("cache",),
+                  fn=lambda: {"shap": len(shap_cache), "llm": len(llm_broker.cache)})
+REGISTRY.callback("fraudpulse_replay_target_tps", "Transactions per second the replay engine is due to emit",
+                  lambda: (replay_stats() or {}).get("target_tps"))
+REGISTRY.callback("fraudpulse_replay_achieved_tps", "Transactions per second the replay engine emitted",
+                  lambda: (replay_stats() or {}).get("achieved_tps"))
+REGISTRY.callback("fraudpulse_drift_psi", "Population stability index of each column vs training data",
+                  labels=("column",), fn=lambda: drift_scores("psi"))
+REGISTRY.callback("fraudpulse_drift_ks", "Binned KS statistic of each column vs training data",
+                  labels=("column",), fn=lambda: drift_scores("ks"))
+REGISTRY.callback("fraudpulse_executor_pending", "Model jobs submitted and not yet finished",
+                  lambda: model_executor.pending if model_executor else None)
+REGISTRY.callback("fraudpulse_llm_active_streams", "Upstream LLM streams in progress",
+                  lambda: llm_scheduler.active)
+REGISTRY.callback("fraudpulse_llm_queue_depth", "Explanations waiting for an LLM slot",
+                  lambda: llm_scheduler.queue_depth)
+REGISTRY.callback("fraudpulse_llm_deduplicated_total", "Explanation requests served by an in-flight stream",
+                  lambda: llm_broker.deduplicated, kind="counter")
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of per-stage latencies and service counters."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 # ── Statistics ────────────────────────────────────────────────
 
 @app.get("/api/stats", response_model=StatsOut)
 async def get_stats():
     """Get live-accumulated dashboard statistics from the streamer."""
-    if streamer is None:
+    if stream_source is None:
         raise HTTPException(503, "Streamer not ready")
 
-    live = streamer.get_live_stats()
+    live = stream_source.get_live_stats()
     return StatsOut(**live)
 
 
+@app.get("/api/drift")
+async def get_drift():
+    """Latest PSI / KS drift scores of live features and model scores vs training data."""
+    if drift_monitor is None:
+        raise HTTPException(503, "Drift monitor not ready")
+    return drift_report() or {"status": "pending", "rows": drift_monitor.rows}
+
+
+@app.get("/api/stats/models", response_model=QualityOut)
+async def get_model_quality():
+    """Live confusion matrix, precision/recall/F1 and PR-AUC for IF, AE and combined."""
+    if stream_source is None:
+        raise HTTPException(503, "Streamer not ready")
+    return QualityOut(**stream_source.get_model_quality())
+
+
 # ── Transactions ──────────────────────────────────────────────
 
 @app.get("/api/transactions")
@@ -153,30 +304,26 @@ async def get_transactions(
     limit: int = Query(20, ge=1, le=100),
 ):
     """Get paginated transaction list with predictions."""
-    if df is None:
+    if dataset is None:
         raise HTTPException(503, "Dataset not loaded")
 
-    start = (page - 1) * limit
-    end = start + limit
-    page_df = df.iloc[start:end]
-
-    results = []
-    for idx, row in page_df.iterrows():
-        features = row[feature_cols].values.astype(np.float64)
-        pred = predictor.predict(features)
-        results.append({
-            "id": int(idx),
-            "time": float(row["Time"]),
-            "amount": float(row["Amount"]),
-            "is_fraud": int(row["Class"]),
-            **pred,
-        })
+    start = min((page - 1) * limit, len(dataset))
+    end = min(start + limit, len(dataset))
+
+    # Predictions were precomputed at startup — a page is just a slice
+    results = batch_to_records({
+        "id": np.arange(start, end),
+        "time": dataset.times[start:end],
+        "amount": dataset.scaled_amounts[start:end],
+        "is_fraud": dataset.labels[start:end],
+        **dataset.predictions_slice(start, end),
+    })
 
     return {
         "transactions": results,
         "page": page,
         "limit": limit,
-        "total": len(df),
+        "total": len(dataset),
     }
 
 
@@ -185,35 +332,84 @@ async def get_transactions(
 @app.get("/api/predict/{transaction_id}", response_model=PredictionResult)
 async def predict_transaction(transaction_id: int):
     """Get dual-model prediction for a specific transaction."""
-    if df is None or predictor is None:
+    if dataset is None or predictor is None:
         raise HTTPException(503, "Service not ready")
-    if transaction_id >= len(df) or transaction_id < 0:
+    if transaction_id >= len(dataset) or transaction_id < 0:
         raise HTTPException(404, "Transaction not found")
 
-    row = df.iloc[transaction_id]
-    features = row[feature_cols].values.astype(np.float64)
-    pred = predictor.predict(features)
-
     return PredictionResult(
         transaction_id=transaction_id,
-        amount=float(row.get("Amount_Original", row["Amount"])),
-        **pred,
+        amount=float(dataset.amounts[transaction_id]),
+        **dataset.prediction(transaction_id),
     )
 
 
+# ── Bulk Scoring ──────────────────────────────────────────────
+
+async def _read_body(request: Request, limit: int) -> bytes:
+    """Request body, refused with 413 once it exceeds `limit` bytes (declared or actually sent)."""
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > limit:
+        raise HTTPException(413, f"Body exceeds {limit} bytes")
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise HTTPException(413, f"Body exceeds {limit} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@app.post("/api/score/batch")
+async def score_batch(request: Request):
+    """
+    Score raw (unscaled) transactions in bulk.
+
+    Body is JSON ({"rows": [...]} or {"columns": {...}}), a .npy matrix
+    (Content-Type: application/x-npy) or an Arrow IPC stream, with features in
+    Time, V1-V28, Amount order. Scores come back as columnar arrays.
+    """
+    if predictor is None or scaler is None:
+        raise HTTPException(503, "Service not ready")
+
+    body = await _read_body(request, MAX_BATCH_BYTES)
+    start = time.perf_counter()
+    try:
+        raw = parse_batch_body(body, request.headers.get("content-type", ""))
+    except LookupError as e:
+        raise HTTPException(415, str(e))
+    except ValueError as e:
+        raise HTTPException(422, str(e))
+
+    if len(raw) > MAX_BATCH_ROWS:
+        raise HTTPException(413, f"Batch exceeds {MAX_BATCH_ROWS} transactions")
+
+    features = scaler.transform(raw)
+    STAGE_SECONDS.observe(time.perf_counter() - start, stage="feature_extraction")
+    STAGE_ROWS.inc(len(raw), stage="feature_extraction")
+
+    preds = await model_executor.run("predict_batch", features)
+    if drift_monitor is not None:
+        drift_monitor.add_batch(features, preds["if_score"], preds["ae_reconstruction_error"])
+
+    # Columns are already plain lists — skip FastAPI's per-element encoder
+    return JSONResponse({
+        "count": len(raw),
+        **{key: values.tolist() for key, values in preds.items()},
+    })
+
+
 # ── SHAP Explainability ──────────────────────────────────────
 
 @app.get("/api/shap/{transaction_id}", response_model=ShapResult)
 async def get_shap(transaction_id: int):
     """Get SHAP values for a specific transaction."""
-    if df is None or explainer is None:
+    if dataset is None or explainer is None:
         raise HTTPException(503, "Service not ready")
-    if transaction_id >= len(df) or transaction_id < 0:
+    if transaction_id >= len(dataset) or transaction_id < 0:
         raise HTTPException(404, "Transaction not found")
 
-    row = df.iloc[transaction_id]
-    features = row[feature_cols].values.astype(np.float64)
-    result = explainer.explain(features)
+    result = await explain_row(transaction_id)
 
     return ShapResult(
         transaction_id=transaction_id,
@@ -223,35 +419,54 @@ async def get_shap(transaction_id: int):
     )
 
 
+@app.post("/api/shap/batch")
+async def get_shap_batch(body: ShapBatchRequest):
+    """Top-k SHAP attributions for many transactions in one TreeExplainer call."""
+    if dataset is None or explainer is None:
+        raise HTTPException(503, "Service not ready")
+    ids = np.asarray(body.transaction_ids)
+    if ids.min() < 0 or ids.max() >= len(dataset):
+        raise HTTPException(404, "Transaction not found")
+
+    result = await model_executor.run(
+        "explain_batch", dataset.features[ids], body.top_k, body.compact, body.approximate,
+    )
+
+    if body.compact:
+        return JSONResponse({
+            "transaction_ids": body.transaction_ids,
+            **{key: value.tolist() if isinstance(value, np.ndarray) else value for key, value in result.items()},
+        })
+    return {
+        "transactions": [
+            {"transaction_id": tx_id, **explanation}
+            for tx_id, explanation in zip(body.transaction_ids, result)
+        ],
+    }
+
+
 # ── LLM Explanation (SSE Streaming) ──────────────────────────
 
 @app.get("/api/explain/{transaction_id}")
 async def explain_transaction(transaction_id: int):
     """Stream LLM-generated fraud explanation via Server-Sent Events."""
-    if df is None or predictor is None:
+    if dataset is None or predictor is None or explainer is None:
         raise HTTPException(503, "Service not ready")
-    if transaction_id >= len(df) or transaction_id < 0:
+    if transaction_id >= len(dataset) or transaction_id < 0:
         raise HTTPException(404, "Transaction not found")
 
-    row = df.iloc[transaction_id]
-    features = row[feature_cols].values.astype(np.float64)
-    pred = predictor.predict(features)
-    shap_data = explainer.explain(features)
+    shap_data = await explain_row(transaction_id)
 
     tx_data = {
         "id": transaction_id,
-        "amount": float(row.get("Amount_Original", row["Amount"])),
-        **pred,
+        "amount": float(dataset.amounts[transaction_id]),
+        **dataset.prediction(transaction_id),
     }
     top5_shap = shap_data["shap_values"][:5]
 
-    async def event_generator():
-        async for chunk in stream_explanation(tx_data, top5_shap):
-            yield f"data: {json.dumps({'text': chunk})}\n\n"
-        yield "data: [DONE]\n\n"
-
     return StreamingResponse(
-        event_generator(),
+        # Coalesced frames: a fallback or a fast model stream costs a few writes, not one per word
+        sse_frames(llm_broker.stream(tx_data, top5_shap)),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache, no-transform",
@@ -265,22 +480,41 @@ async def explain_transaction(transaction_id: int):
 # ── WebSocket Transaction Stream ─────────────────────────────
 
 @app.websocket("/ws/transactions")
-async def websocket_transactions(websocket: WebSocket):
-    """Real-time transaction feed via WebSocket."""
-    if streamer is None:
+async def websocket_transactions(websocket: WebSocket, encoding: str = Query("json")):
+    """
+    Real-time transaction feed via WebSocket.
+    ?encoding=json (one object per frame), json-batch or binary — see services.wire.
+    """
+    if hub is None:
         await websocket.close(code=1011, reason="Streamer not ready")
         return
+    if encoding not in ENCODINGS:
+        await websocket.close(code=1003, reason=f"Unknown encoding; use one of {', '.join(ENCODINGS)}")
+        return
 
     await websocket.accept()
-    print("[WS] Client connected")
+    subscription = hub.subscribe()
+    batch_max = 1 if encoding == "json" else WS_BATCH_MAX
+    print(f"[WS] Client connected ({hub.subscriber_count} subscribers, {encoding})")
 
     try:
-        async for tx in streamer.stream_generator():
-            await websocket.send_json(tx)
+        while True:
+            txs = await subscription.get_batch(batch_max)
+            with STAGE_SECONDS.time(stage="ws_send"):
+                frame = wire_encoder.frame(txs, encoding)
+                if isinstance(frame, bytes):
+                    await websocket.send_bytes(frame)
+                else:
+                    await websocket.send_text(frame)
+            WS_FRAMES.inc(encoding=encoding)
+            WS_BYTES.inc(len(frame), encoding=encoding)
+            WS_TRANSACTIONS.inc(len(txs), encoding=encoding)
     except WebSocketDisconnect:
         print("[WS] Client disconnected")
     except Exception as e:
         print(f"[WS] Error: {e}")
+    finally:
+        hub.unsubscribe(subscription)
 
 
 # ── HTTP Polling Fallback ─────────────────────────────────────
@@ -289,16 +523,19 @@ async def websocket_transactions(websocket: WebSocket):
 async def poll_transactions(
     since_id: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=50),
+    tail: bool = Query(False),
 ):
-    """HTTP polling fallback for when WebSocket is unavailable."""
-    if streamer is None:
+    """
+    HTTP polling fallback for when WebSocket is unavailable.
+
+    Returns transactions after since_id oldest first; poll again with
+    next_since_id. gap > 0 means rows were evicted before this client read
+    them, has_more that another page is already buffered, reset that
+    since_id came from before a restart. tail=true starts at the newest
+    `limit` rows (seeding a fresh view).
+    """
+    if stream_source is None:
         raise HTTPException(503, "Streamer not ready")
 
-    # Generate a new transaction on each poll for liveliness
-    tx = streamer.get_next_transaction()
-    buffered = streamer.get_buffered(since_id=since_id, limit=limit)
-
-    return {
-        "transactions": buffered,
-        "latest_id": buffered[-1]["id"] if buffered else since_id,
-    }
+    # The background producer keeps the buffer fresh; polling only reads it
+    return stream_source.get_buffered(since_id=since_id, limit=limit, tail=tail)
@@ -1,10 +1,13 @@
 """
 FraudPulse ML Training Pipeline.
 Trains dual models (Isolation Forest + Autoencoder) on the Kaggle Credit Card Fraud dataset.
-Computes SHAP values and saves everything to disk.
+Computes SHAP values and saves everything to disk, plus the drift
+reference (training-time feature and score distributions) that the
+server's drift monitor compares live traffic against.
 """
 
 import os
+import sys
 import pickle
 import numpy as np
 import pandas as pd
@@ -53,6 +56,50 @@ class FraudAutoencoder(nn.Module):
         return decoded
 
 
+# ── Inference Export ──────────────────────────────────────────
+
+def fold_batchnorm(model: FraudAutoencoder) -> nn.Sequential:
+    """
+    Inference-only copy of the autoencoder as a plain Linear/ReLU stack.
+    Every BatchNorm here follows a ReLU, so its affine transform is folded
+    into the weights and bias of the next Linear layer.
+    """
+    model = model.cpu().eval()
+    layers = []
+    pending = None  # (scale, shift) of a BatchNorm waiting for the next Linear
+
+    with torch.no_grad():
+        for module in list(model.encoder) + list(model.decoder):
+            if isinstance(module, nn.BatchNorm1d):
+                scale = module.weight / torch.sqrt(module.running_var + module.eps)
+                pending = (scale, module.bias - module.running_mean * scale)
+            elif isinstance(module, nn.Linear):
+                weight, bias = module.weight, module.bias
+                if pending is not None:
+                    scale, shift = pending
+                    bias = bias + weight @ shift
+                    weight = weight * scale
+                    pending = None
+                linear = nn.Linear(module.in_features, module.out_features)
+                linear.weight.copy_(weight)
+                linear.bias.copy_(bias)
+                layers.append(linear)
+            else:
+                layers.append(nn.ReLU())
+
+    if pending is not None:
+        raise ValueError("BatchNorm without a following Linear layer cannot be folded")
+    return nn.Sequential(*layers).eval()
+
+
+def export_torchscript(model: FraudAutoencoder, input_dim: int) -> torch.jit.ScriptModule:
+    """Trace and freeze the BatchNorm-folded autoencoder."""
+    folded = fold_batchnorm(model)
+    with torch.no_grad():
+        traced = torch.jit.trace(folded, torch.zeros(1, input_dim))
+    return torch.jit.freeze(traced.eval())
+
+
 # ── Data Loading ──────────────────────────────────────────────
 
 def load_and_preprocess():
@@ -191,15 +238,37 @@ def train_autoencoder(df: pd.DataFrame, epochs: int = 30, batch_size: int = 512)
     }, model_path)
     print(f"    Saved to {model_path}")
 
-    return model, threshold
+    # Frozen TorchScript artifact for the low-latency inference backend
+    script_path = os.path.join(MODEL_DIR, "autoencoder_ts.pt")
+    export_torchscript(model, X_all.shape[1]).save(script_path)
+    print(f"    TorchScript export saved to {script_path}")
+
+    return model, threshold, errors
+
+
+# ── Drift Reference ───────────────────────────────────────────
+
+def save_drift_reference(df: pd.DataFrame, if_model: IsolationForest, ae_errors: np.ndarray):
+    """Save per-column reference bins for services.drift (features, IF score, AE error)."""
+    # services/ sits next to models/ when run as `python models/train.py`
+    sys.path.insert(0, os.path.join(MODEL_DIR, ".."))
+    from services.drift import DRIFT_REFERENCE_PATH, build_reference, save_reference
+
+    print("\n[*] Saving drift reference...")
+    X = df[[c for c in df.columns if c != "Class"]].values
+    # Same normalization as FraudPredictor.predict_batch
+    if_score = np.clip(-if_model.decision_function(X) * 2 + 0.5, 0.0, 1.0)
+    save_reference(build_reference(X, if_score, ae_errors))
+    print(f"    Saved to {DRIFT_REFERENCE_PATH}")
 
 
 # ── Main ──────────────────────────────────────────────────────
 
 def main():
     df = load_and_preprocess()
-    train_isolation_forest(df)
-    train_autoencoder(df)
+    if_model = train_isolation_forest(df)
+    _, _, ae_errors = train_autoencoder(df)
+    save_drift_reference(df, if_model, ae_errors)
     print("\n[✓] All models trained and saved successfully!")
     print(f"    Models directory: {MODEL_DIR}")
 
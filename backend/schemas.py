@@ -1,6 +1,6 @@
 """Pydantic schemas for FraudPulse API."""
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 from enum import Enum
 
@@ -51,6 +51,34 @@ class ShapResult(BaseModel):
     shap_values: list[ShapValue]
 
 
+class ShapBatchRequest(BaseModel):
+    transaction_ids: list[int] = Field(..., min_length=1, max_length=1000)
+    top_k: Optional[int] = Field(5, ge=1)  # None = all features
+    compact: bool = False  # columnar arrays instead of per-transaction objects
+    approximate: Optional[bool] = None  # forest path attributions; None = server default
+
+
+class Quantiles(BaseModel):
+    p50: float
+    p90: float
+    p99: float
+
+
+class WindowStatsOut(BaseModel):
+    """Aggregates over the last `window_seconds` of the live feed."""
+    window_seconds: float
+    total_transactions: int
+    transactions_per_second: float
+    flagged_transactions: int
+    fraud_rate: float
+    model_accuracy: float
+    blocked_amount: float
+    avg_risk_score: float
+    risk_distribution: dict[str, int]
+    confidence_quantiles: Optional[Quantiles] = None
+    amount_quantiles: Optional[Quantiles] = None
+
+
 class StatsOut(BaseModel):
     total_transactions: int
     flagged_transactions: int
@@ -59,6 +87,31 @@ class StatsOut(BaseModel):
     blocked_amount: float
     avg_risk_score: float
     risk_distribution: dict[str, int] = {}
+    # Rolling windows keyed by name ("1m", "5m", "1h")
+    windows: dict[str, WindowStatsOut] = {}
+
+
+class ConfusionMatrix(BaseModel):
+    tp: int
+    fp: int
+    tn: int
+    fn: int
+
+
+class ModelQualityOut(BaseModel):
+    confusion_matrix: ConfusionMatrix
+    precision: float
+    recall: float
+    f1: float
+    accuracy: float
+    pr_auc: Optional[float] = None  # None until a fraud row has been seen
+
+
+class QualityOut(BaseModel):
+    """Live detector quality on the streamed transactions."""
+    total_transactions: int
+    fraud_transactions: int
+    models: dict[str, ModelQualityOut]  # isolation_forest, autoencoder, combined
 
 
 class StreamTransaction(BaseModel):
@@ -73,3 +126,4 @@ class StreamTransaction(BaseModel):
     recommendation: str
     if_label: str  # "fraud" or "legitimate"
     ae_label: str  # "fraud" or "legitimate"
+    top_features: list[ShapValue] = []  # approximate top drivers, most influential first
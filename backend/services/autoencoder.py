@@ -0,0 +1,139 @@
+"""
+Autoencoder Inference Backends.
+All backends evaluate the BatchNorm-folded Linear/ReLU stack and return
+per-row reconstruction error (MSE):
+  numpy        — plain float32 matmuls, no framework dispatch (default)
+  torchscript  — frozen TorchScript module under torch.inference_mode
+  eager        — the original FraudAutoencoder nn.Module
+Selected with AE_BACKEND. Torch intra-op threads follow the model
+executor's MODEL_THREADS, so the two never disagree.
+
+The numpy engine can be saved as .npy weights and memory-mapped back
+without importing torch at all (torch is imported lazily), which keeps
+each serving worker ~200 MB smaller.
+"""
+
+import os
+import json
+import shutil
+import numpy as np
+from pathlib import Path
+
+AE_BACKEND = os.getenv("AE_BACKEND") or "numpy"
+
+
+def _as_float32(X: np.ndarray) -> np.ndarray:
+    x = np.ascontiguousarray(X, dtype=np.float32)
+    # Memory-mapped rows are read-only; torch needs a writable buffer
+    return x if x.flags.writeable else x.copy()
+
+
+class NumpyAutoencoder:
+    """Folded autoencoder evaluated as float32 matmuls."""
+
+    def __init__(self, layers: list[tuple[np.ndarray, np.ndarray]]):
+        # Stored as (in, out) so a batch is h @ W + b
+        self.layers = layers
+
+    @classmethod
+    def from_folded(cls, folded) -> "NumpyAutoencoder":
+        """Build from the Linear/ReLU nn.Sequential returned by fold_batchnorm()."""
+        import torch.nn as nn
+
+        linears = [m for m in folded if isinstance(m, nn.Linear)]
+        if len(folded) != 2 * len(linears) - 1:
+            raise ValueError("Expected alternating Linear/ReLU layers ending in Linear")
+        return cls([
+            (m.weight.detach().numpy().T.copy(), m.bias.detach().numpy().copy())
+            for m in linears
+        ])
+
+    def save(self, path: Path, threshold: float):
+        """Write the layer weights and the fraud threshold to a directory (replaced atomically)."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        for i, (weight, bias) in enumerate(self.layers):
+            np.save(tmp / f"weight_{i}.npy", weight)
+            np.save(tmp / f"bias_{i}.npy", bias)
+        (tmp / "meta.json").write_text(json.dumps({"layers": len(self.layers), "threshold": float(threshold)}))
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> tuple["NumpyAutoencoder", float]:
+        """Memory-map weights written by save(); returns (engine, threshold)."""
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text())
+        layers = [
+            (np.load(path / f"weight_{i}.npy", mmap_mode="r"), np.load(path / f"bias_{i}.npy", mmap_mode="r"))
+            for i in range(meta["layers"])
+        ]
+        return cls(layers), meta["threshold"]
+
+    def reconstruction_error(self, X: np.ndarray) -> np.ndarray:
+        x = np.ascontiguousarray(X, dtype=np.float32)
+        h = x
+        for i, (weight, bias) in enumerate(self.layers):
+            h = h @ weight + bias
+            if i < len(self.layers) - 1:
+                np.maximum(h, 0, out=h)
+        return np.mean((x - h) ** 2, axis=1)
+
+
+class TorchAutoencoder:
+    """Eager nn.Module or frozen TorchScript module run under inference_mode."""
+
+    def __init__(self, module):
+        self.module = module
+
+    def reconstruction_error(self, X: np.ndarray) -> np.ndarray:
+        import torch
+
+        with torch.inference_mode():
+            x_tensor = torch.from_numpy(_as_float32(X))
+            reconstructed = self.module(x_tensor)
+            return torch.mean((x_tensor - reconstructed) ** 2, dim=1).numpy()
+
+
+def load_autoencoder(checkpoint: dict, backend: str = AE_BACKEND, script_path: str | None = None):
+    """
+    Build the inference engine for an autoencoder checkpoint.
+
+    Args:
+        checkpoint: dict saved by models/train.py (model_state_dict, input_dim, threshold)
+        backend: "numpy", "torchscript" or "eager"
+        script_path: exported TorchScript file; traced from the checkpoint if missing
+
+    Returns:
+        engine exposing reconstruction_error(X) -> (n_rows,) float32
+    """
+    import torch
+    from models.train import FraudAutoencoder, fold_batchnorm, export_torchscript
+    from services.executor import MODEL_THREADS
+
+    torch.set_num_threads(MODEL_THREADS)
+
+    input_dim = checkpoint["input_dim"]
+    model = FraudAutoencoder(input_dim=input_dim)
+    model.load_state_dict(checkpoint["model_state_dict"])
+    model.eval()
+
+    if backend == "eager":
+        engine = TorchAutoencoder(model)
+    elif backend == "torchscript":
+        if script_path and os.path.exists(script_path):
+            module = torch.jit.load(script_path, map_location="cpu")
+        else:
+            module = export_torchscript(model, input_dim)
+        engine = TorchAutoencoder(module)
+    elif backend == "numpy":
+        engine = NumpyAutoencoder.from_folded(fold_batchnorm(model))
+    else:
+        raise ValueError(f"Unknown AE_BACKEND: {backend}")
+
+    # Warm-up: the TorchScript profiling executor optimizes after a couple of runs
+    for n_rows in (1, 64, 1, 64):
+        engine.reconstruction_error(np.zeros((n_rows, input_dim), dtype=np.float32))
+    return engine
@@ -0,0 +1,91 @@
+"""
+Micro-batching Service.
+Coalesces concurrent single-row model requests into one batched call.
+Requests queue for up to `max_wait` seconds (or until `max_batch` rows
+are waiting); the batch function is awaited (it runs on the model
+executor) so the event loop keeps serving WebSocket feeds and health
+checks, and each caller's future is resolved with its own row's result.
+"""
+
+import asyncio
+import numpy as np
+from typing import Any, Awaitable, Callable
+
+
+class MicroBatcher:
+    """Async front end that turns single-row calls into `await batch_fn(X)` calls."""
+
+    def __init__(
+        self,
+        batch_fn: Callable[[np.ndarray], Awaitable[list]],
+        max_batch: int = 32,
+        max_wait: float = 0.005,
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    async def submit(self, row: np.ndarray) -> Any:
+        """Queue one feature row and wait for its result."""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        # One pending get at a time, awaited with asyncio.wait: wait_for before Python 3.12
+        # can swallow the cancellation stop() sends if the get completes at the same moment
+        getter: asyncio.Task | None = None
+        try:
+            while True:
+                if getter is None:
+                    getter = asyncio.ensure_future(self._queue.get())
+                batch = [await getter]
+                getter = None
+                deadline = loop.time() + self.max_wait
+
+                # Requests that queued while the previous batch ran join immediately
+                while len(batch) < self.max_batch:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    getter = asyncio.ensure_future(self._queue.get())
+                    done, _ = await asyncio.wait({getter}, timeout=timeout)
+                    if not done:
+                        break  # the pending get opens the next batch
+                    batch.append(getter.result())
+                    getter = None
+
+                X = np.stack([row for row, _ in batch])
+                try:
+                    results = await self.batch_fn(X)
+                except Exception as e:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            if getter is not None:
+                getter.cancel()
@@ -0,0 +1,231 @@
+"""
+Resident Dataset Service.
+Holds the served transactions as one C-contiguous float32 feature matrix
+with label and display-amount side arrays, plus precomputed predictions.
+Row access returns zero-copy views instead of building pandas Series.
+
+The preprocessed dataset is converted once into a memory-mapped .npy cache
+with a JSON manifest; later boots open it lazily instead of re-parsing the CSV.
+Run `python -m services.dataset` to build the cache ahead of time.
+"""
+
+import gc
+import json
+import os
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from services.preprocessing import FEATURE_NAMES, FeatureScaler
+from services.predictor import decode_labels
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+DATA_GZ = DATA_DIR / "creditcard.csv.gz"
+DATA_SAMPLE = DATA_DIR / "creditcard_sample.csv"
+CACHE_DIR = Path(os.getenv("DATASET_CACHE_DIR") or DATA_DIR / "cache")
+# Optional explicit source file (e.g. pin benchmarks to the bundled sample)
+DATASET_PATH = os.getenv("DATASET_PATH", "")
+
+# Optional cap on converted rows (all fraud kept, legit sampled); 0 keeps every row
+MAX_ROWS = int(os.getenv("MAX_ROWS") or 0)
+
+CACHE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+PREDICTIONS_MANIFEST_NAME = "predictions.json"
+
+TIME_COL = FEATURE_NAMES.index("Time")
+AMOUNT_COL = FEATURE_NAMES.index("Amount")
+
+
+class TransactionDataset:
+    """Columnar, read-only view of the resident transactions."""
+
+    def __init__(self, features: np.ndarray, labels: np.ndarray, amounts: np.ndarray):
+        self.features = np.ascontiguousarray(features, dtype=np.float32)
+        self.labels = np.asarray(labels, dtype=np.int8)
+        self.amounts = np.asarray(amounts, dtype=np.float64)
+        self.predictions: dict[str, np.ndarray] = {}
+
+    @classmethod
+    def open(cls, cache_dir: Path = CACHE_DIR) -> tuple["TransactionDataset", FeatureScaler]:
+        """
+        Memory-map a dataset cache written by build_cache().
+
+        Returns:
+            (dataset, scaler) — the scaler carries the fitted Time/Amount parameters
+        """
+        manifest = read_manifest(cache_dir)
+        if manifest is None:
+            raise FileNotFoundError(f"No dataset cache in {cache_dir}")
+
+        arrays = {name: np.load(cache_dir / entry["file"], mmap_mode="r") for name, entry in manifest["arrays"].items()}
+        dataset = cls(arrays["features"], arrays["labels"], arrays["amounts"])
+        return dataset, FeatureScaler.from_state(manifest["scaler"])
+
+    def __len__(self) -> int:
+        return len(self.features)
+
+    @property
+    def times(self) -> np.ndarray:
+        """Scaled Time column (strided view)."""
+        return self.features[:, TIME_COL]
+
+    @property
+    def scaled_amounts(self) -> np.ndarray:
+        """Scaled Amount column (strided view)."""
+        return self.features[:, AMOUNT_COL]
+
+    def row(self, idx: int) -> np.ndarray:
+        """Feature vector for one transaction (view, no copy)."""
+        return self.features[idx]
+
+    def prediction(self, idx: int) -> dict:
+        """Precomputed dual-model prediction for one row, as Python scalars."""
+        return {key: values[0].item() for key, values in self.predictions_slice(idx, idx + 1).items()}
+
+    def predictions_take(self, idx: np.ndarray) -> dict[str, np.ndarray]:
+        """Precomputed predictions for arbitrary rows as decoded columnar arrays."""
+        return decode_labels({key: values[idx] for key, values in self.predictions.items()})
+
+    def predictions_slice(self, start: int, stop: int) -> dict[str, np.ndarray]:
+        """Precomputed predictions for rows [start, stop) as decoded columnar arrays."""
+        return decode_labels({key: values[start:stop] for key, values in self.predictions.items()})
+
+    def load_predictions(self, cache_dir: Path, fingerprint: str) -> bool:
+        """Memory-map cached predictions if they were produced by the same models."""
+        path = cache_dir / PREDICTIONS_MANIFEST_NAME
+        if not path.exists():
+            return False
+        manifest = json.loads(path.read_text())
+        if manifest.get("models") != fingerprint or manifest.get("rows") != len(self):
+            return False
+        self.predictions = {name: np.load(cache_dir / file, mmap_mode="r") for name, file in manifest["arrays"].items()}
+        return True
+
+    def save_predictions(self, cache_dir: Path, fingerprint: str):
+        """Write the current predictions next to the dataset cache."""
+        (cache_dir / PREDICTIONS_MANIFEST_NAME).unlink(missing_ok=True)
+        files = {}
+        for name, values in self.predictions.items():
+            files[name] = f"pred_{name}.npy"
+            np.save(cache_dir / files[name], values)
+        _write_json(cache_dir / PREDICTIONS_MANIFEST_NAME, {"models": fingerprint, "rows": len(self), "arrays": files})
+
+
+# ── Cache conversion ──────────────────────────────────────────
+
+def find_source() -> Path | None:
+    """Preferred raw dataset — DATASET_PATH, else full gzip, falling back to the bundled sample."""
+    if DATASET_PATH:
+        return Path(DATASET_PATH)
+    return DATA_GZ if DATA_GZ.exists() else DATA_SAMPLE if DATA_SAMPLE.exists() else None
+
+
+def read_manifest(cache_dir: Path = CACHE_DIR) -> dict | None:
+    path = cache_dir / MANIFEST_NAME
+    if not path.exists():
+        return None
+    manifest = json.loads(path.read_text())
+    return manifest if manifest.get("version") == CACHE_VERSION else None
+
+
+def cache_is_current(source: Path, cache_dir: Path = CACHE_DIR, max_rows: int = MAX_ROWS) -> bool:
+    """True if the cache was converted from this exact source file and row cap."""
+    manifest = read_manifest(cache_dir)
+    return (
+        manifest is not None
+        and manifest["source"] == source.name
+        and manifest["source_size"] == source.stat().st_size
+        and manifest["max_rows"] == max_rows
+    )
+
+
+def load_frame(source: Path, max_rows: int = MAX_ROWS) -> tuple[pd.DataFrame, int]:
+    """
+    Parse the raw CSV, optionally sampling it down to max_rows.
+
+    Returns:
+        (DataFrame, total rows in the source)
+    """
+    compression = "gzip" if source.name.endswith(".gz") else None
+    full_df = pd.read_csv(source, compression=compression)
+    total_rows = len(full_df)
+
+    if not max_rows or total_rows <= max_rows:
+        return full_df, total_rows
+
+    # Keep every fraud row, sample the legit remainder
+    fraud_df = full_df[full_df["Class"] == 1]
+    legit_df = full_df[full_df["Class"] == 0]
+    legit_sample = legit_df.sample(
+        n=min(max_rows - len(fraud_df), len(legit_df)),
+        random_state=42,
+    )
+    df = pd.concat([legit_sample, fraud_df]).sample(frac=1, random_state=42).reset_index(drop=True)
+    del full_df, fraud_df, legit_df, legit_sample
+    gc.collect()
+    return df, total_rows
+
+
+def build_cache(source: Path, cache_dir: Path = CACHE_DIR, max_rows: int = MAX_ROWS) -> dict:
+    """
+    Convert the raw CSV into scaled float32 features + side arrays on disk.
+
+    The manifest is written last, so an interrupted conversion is never opened.
+    """
+    df, total_rows = load_frame(source, max_rows)
+
+    # Fit on raw values; raw transactions posted to /api/score/batch reuse it
+    scaler = FeatureScaler().fit(df)
+    arrays = {
+        "features": scaler.transform(df[FEATURE_NAMES].values).astype(np.float32),
+        "labels": df["Class"].to_numpy(dtype=np.int8),
+        # Original (unscaled) Amount for display
+        "amounts": df["Amount"].to_numpy(dtype=np.float64),
+    }
+    del df
+    gc.collect()
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    (cache_dir / MANIFEST_NAME).unlink(missing_ok=True)
+    (cache_dir / PREDICTIONS_MANIFEST_NAME).unlink(missing_ok=True)
+
+    entries = {}
+    for name, values in arrays.items():
+        entries[name] = {"file": f"{name}.npy", "dtype": str(values.dtype), "shape": list(values.shape)}
+        np.save(cache_dir / entries[name]["file"], values)
+
+    manifest = {
+        "version": CACHE_VERSION,
+        "source": source.name,
+        "source_size": source.stat().st_size,
+        "source_rows": total_rows,
+        "max_rows": max_rows,
+        "rows": len(arrays["labels"]),
+        "feature_names": FEATURE_NAMES,
+        "scaler": scaler.state(),
+        "arrays": entries,
+    }
+    _write_json(cache_dir / MANIFEST_NAME, manifest)
+    return manifest
+
+
+def _write_json(path: Path, payload: dict):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(payload, indent=2))
+    os.replace(tmp, path)
+
+
+# ── Main ──────────────────────────────────────────────────────
+
+def main():
+    source = find_source()
+    if source is None:
+        raise FileNotFoundError(f"No dataset found in {DATA_DIR}")
+
+    print(f"[*] Converting {source} → {CACHE_DIR}")
+    manifest = build_cache(source)
+    print(f"[✓] Dataset cache written: {manifest['rows']} rows (from {manifest['source_rows']} total)")
+
+
+if __name__ == "__main__":
+    main()
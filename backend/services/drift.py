@@ -0,0 +1,241 @@
+"""
+Drift Monitor.
+Checks whether live inputs and model scores still look like the training
+data. models/train.py saves a reference: for every feature (Time,
+V1–V28, Amount), the IF score and the AE reconstruction error, it stores
+DRIFT_BINS quantile bin edges with the training counts per bin.
+
+At serve time every scored batch (live feed and /api/score/batch) is
+binned against the same edges. That costs one searchsorted and one
+bincount per column. Counts go into the current slot of a ring of
+DRIFT_WINDOWS slots. Every DRIFT_INTERVAL seconds the ring is summed and
+compared with the reference, then advances, so scores always cover
+about the last DRIFT_INTERVAL x DRIFT_WINDOWS seconds of traffic:
+
+  psi   population stability index over the bins
+        (< 0.1 stable, < 0.25 moderate, else significant)
+  ks    largest gap between the binned CDFs (a KS statistic at bin resolution)
+
+With several server workers every worker bins its own traffic into a
+shared inbox (services.shared_feed.SharedCounts); only the stream leader
+drains it, evaluates, and publishes the report through the shared feed.
+
+Build or rebuild the reference without retraining (from backend/):
+    python -m services.drift
+"""
+
+import os
+import json
+import time
+import asyncio
+import numpy as np
+from pathlib import Path
+from typing import Callable
+from services.preprocessing import FEATURE_NAMES
+
+MODEL_DIR = Path(__file__).resolve().parent.parent / "models"
+DRIFT_REFERENCE_PATH = MODEL_DIR / "drift_reference.json"
+
+DRIFT_BINS = int(os.getenv("DRIFT_BINS") or 20)
+# Seconds between evaluations (0 disables the monitor)
+DRIFT_INTERVAL = float(os.getenv("DRIFT_INTERVAL") or 30)
+# Evaluation intervals kept in the comparison window
+DRIFT_WINDOWS = int(os.getenv("DRIFT_WINDOWS") or 10)
+# Live rows needed before drift is scored
+DRIFT_MIN_ROWS = int(os.getenv("DRIFT_MIN_ROWS") or 500)
+
+SCORE_COLUMNS = ("if_score", "ae_reconstruction_error")
+COLUMNS = tuple(FEATURE_NAMES) + SCORE_COLUMNS
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+# Floor for empty bins so PSI stays finite
+EPSILON = 1e-4
+
+
+def _columns(features: np.ndarray, if_score: np.ndarray, ae_error: np.ndarray):
+    features = np.atleast_2d(features)
+    return [features[:, i] for i in range(features.shape[1])] + [if_score, ae_error]
+
+
+def build_reference(features: np.ndarray, if_score: np.ndarray, ae_error: np.ndarray, bins: int = DRIFT_BINS) -> dict:
+    """Quantile bin edges and per-bin counts of the training data, for every monitored column."""
+    reference = {"version": 1, "bins": bins, "rows": int(len(features)), "columns": {}}
+    for name, values in zip(COLUMNS, _columns(features, if_score, ae_error)):
+        values = np.asarray(values, dtype=np.float64)
+        # Heavily tied columns (e.g. round amounts) end up with fewer, wider bins
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+        counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+        reference["columns"][name] = {
+            "edges": edges.tolist(),
+            "counts": counts.tolist(),
+            "quantiles": dict(zip(("p01", "p50", "p99"), np.quantile(values, [0.01, 0.5, 0.99]).round(6).tolist())),
+        }
+    return reference
+
+
+def save_reference(reference: dict, path: Path = DRIFT_REFERENCE_PATH):
+    path = Path(path)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(reference, f)
+    os.replace(tmp, path)
+
+
+def load_reference(path: Path = DRIFT_REFERENCE_PATH) -> dict | None:
+    try:
+        with open(path) as f:
+            reference = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return reference if tuple(reference.get("columns", ())) == COLUMNS else None
+
+
+def ensure_reference(dataset, cache_dir: Path, fingerprint: str) -> dict:
+    """
+    The training reference, or — for models trained before it existed — one
+    derived from the resident dataset (the training data) and cached next to it.
+    """
+    reference = load_reference()
+    if reference is not None:
+        return reference
+    derived = Path(cache_dir) / f"drift_reference-{fingerprint[:16]}.json"
+    reference = load_reference(derived)
+    if reference is None:
+        print(f"[!] No {DRIFT_REFERENCE_PATH.name} from training — deriving one from the dataset")
+        reference = build_reference(
+            dataset.features, dataset.predictions["if_score"], dataset.predictions["ae_reconstruction_error"],
+        )
+        save_reference(reference, derived)
+    return reference
+
+
+def _status(psi: float) -> str:
+    if psi < PSI_MODERATE:
+        return "stable"
+    return "moderate" if psi < PSI_SIGNIFICANT else "significant"
+
+
+class DriftMonitor:
+    """Binned live counts over a rolling window, scored against the training reference."""
+
+    def __init__(self, reference: dict, interval: float = DRIFT_INTERVAL, windows: int = DRIFT_WINDOWS,
+                 min_rows: int = DRIFT_MIN_ROWS):
+        self.interval = interval
+        self.min_rows = min_rows
+        self.reference_rows = reference["rows"]
+        self.edges = [np.asarray(reference["columns"][name]["edges"]) for name in COLUMNS]
+        expected = [np.asarray(reference["columns"][name]["counts"], dtype=np.float64) for name in COLUMNS]
+        self.expected = [np.maximum(e / e.sum(), EPSILON) for e in expected]
+        # Every column's bins concatenated: the flat counts vector shared between workers
+        sizes = [len(e) + 1 for e in self.edges]
+        self.n_counts = sum(sizes)
+        self.offsets = np.cumsum(sizes)[:-1]
+        # Ring of evaluation intervals; each slot holds per-column bin counts
+        self._slots = [[np.zeros(len(e) + 1, dtype=np.int64) for e in self.edges] for _ in range(windows)]
+        self._current = 0
+        self.rows = 0
+        self.report: dict | None = None
+        # Multi-worker: counts go to a shared inbox, and only the worker for which
+        # `evaluates()` is true (the stream leader) drains and scores it
+        self.inbox = None
+        self.evaluates: Callable[[], bool] | None = None
+        self._task: asyncio.Task | None = None
+
+    def add_batch(self, features: np.ndarray, if_score: np.ndarray, ae_error: np.ndarray):
+        """Bin one batch of scored rows (scaled features, as fed to the models)."""
+        counts = np.concatenate([
+            np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+            for edges, values in zip(self.edges, _columns(features, if_score, ae_error))
+        ])
+        if self.inbox is not None:
+            self.inbox.add(counts)
+        else:
+            self._add_counts(counts)
+        self.rows += len(if_score)
+
+    def _add_counts(self, counts: np.ndarray):
+        for slot_counts, column in zip(self._slots[self._current], np.split(counts, self.offsets)):
+            slot_counts += column
+
+    def evaluate(self) -> dict:
+        """Score the current window against the reference, then advance the ring."""
+        if self.inbox is not None:
+            self._add_counts(self.inbox.drain())
+        live = [sum(slot[i] for slot in self._slots) for i in range(len(COLUMNS))]
+        n = int(live[0].sum())
+        report = {
+            "evaluated_at": time.time(),
+            "window_seconds": self.interval * len(self._slots),
+            "rows": n,
+            "reference_rows": self.reference_rows,
+        }
+        if n < self.min_rows:
+            report.update(status="warming_up", columns={}, drifted=[])
+        else:
+            columns = {}
+            for name, counts, expected in zip(COLUMNS, live, self.expected):
+                actual = np.maximum(counts / n, EPSILON)
+                psi = float(((actual - expected) * np.log(actual / expected)).sum())
+                ks = float(np.abs(np.cumsum(counts / n) - np.cumsum(expected / expected.sum())).max())
+                columns[name] = {"psi": round(psi, 4), "ks": round(ks, 4), "status": _status(psi)}
+            drifted = sorted((c for c in columns if columns[c]["status"] != "stable"), key=lambda c: -columns[c]["psi"])
+            worst = max(c["psi"] for c in columns.values())
+            report.update(status=_status(worst), columns=columns, drifted=drifted)
+
+        self._current = (self._current + 1) % len(self._slots)
+        for counts in self._slots[self._current]:
+            counts[:] = 0
+        self.report = report
+        return report
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        status = None
+        while True:
+            await asyncio.sleep(self.interval)
+            if self.evaluates is not None and not self.evaluates():
+                continue
+            report = self.evaluate()
+            # Log transitions only; the report and /metrics carry the rest
+            if report["status"] != status and report["status"] != "warming_up":
+                status = report["status"]
+                marker = "[*]" if status == "stable" else "[!]"
+                print(f"{marker} Drift {status}: {', '.join(report['drifted'][:5]) or 'all columns within range'}")
+
+
+def main():
+    """Rebuild models/drift_reference.json from the dataset cache and its precomputed predictions."""
+    from services.dataset import CACHE_DIR, TransactionDataset, build_cache, cache_is_current, find_source
+    from services.predictor import FraudPredictor
+
+    source = find_source()
+    if source is None:
+        raise FileNotFoundError("No dataset found in data/")
+    if not cache_is_current(source, CACHE_DIR):
+        build_cache(source, CACHE_DIR)
+    dataset, _ = TransactionDataset.open(CACHE_DIR)
+    predictor = FraudPredictor(cache_dir=CACHE_DIR)
+    if not dataset.load_predictions(CACHE_DIR, predictor.fingerprint):
+        dataset.predictions = predictor.predict_all(dataset.features)
+
+    reference = build_reference(
+        dataset.features, dataset.predictions["if_score"], dataset.predictions["ae_reconstruction_error"],
+    )
+    save_reference(reference)
+    print(f"[✓] Drift reference for {len(dataset)} rows saved to {DRIFT_REFERENCE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
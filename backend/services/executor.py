@@ -0,0 +1,163 @@
+"""
+Model Executor.
+Every CPU-bound model call (batch scoring, SHAP) is dispatched here
+instead of running on the event loop, so WebSocket feeds and health
+checks keep their latency under analytic load.
+
+  thread   (default) a ThreadPoolExecutor over the in-process models;
+           cheap, and NumPy scoring releases the GIL — but exact SHAP
+           (TreeExplainer) holds it, stalling the loop for a whole batch
+  process  a ProcessPoolExecutor whose workers load their own models
+           (flattened forest / numpy autoencoder memory-mapped from the
+           dataset cache) — isolates heavy exact-SHAP load; on one core,
+           /api/health p99 under 8 concurrent 200-row SHAP batches went
+           from ~1.4 s (thread) to ~0.2 s (process)
+
+Jobs are named ("predict_batch", "explain_batch") so the same call works
+in both modes. Pool size and per-worker BLAS/torch threads are set
+together (MODEL_WORKERS x MODEL_THREADS <= cores / SERVE_WORKERS by
+default, since every uvicorn worker builds its own pool) to avoid
+oversubscription; the autoencoder's torch threads follow MODEL_THREADS.
+Queue wait and run time are recorded per job. Process workers record
+per-stage timings into their own registry, so each job ships them back
+with its result and they are merged into the parent's /metrics.
+"""
+
+import os
+import time
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable
+from services.serve import SERVE_WORKERS
+from services.metrics import REGISTRY, STAGE_SECONDS, STAGE_ROWS, TRANSACTIONS_SCORED
+
+MODEL_EXECUTOR = os.getenv("MODEL_EXECUTOR") or "thread"
+# Cores available to this server process: each uvicorn worker builds its own pool
+_CORES = max(1, (os.cpu_count() or 1) // SERVE_WORKERS)
+MODEL_WORKERS = int(os.getenv("MODEL_WORKERS") or min(4, _CORES))
+# BLAS / torch intra-op threads per worker
+MODEL_THREADS = int(os.getenv("MODEL_THREADS") or max(1, _CORES // MODEL_WORKERS))
+
+QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "fraudpulse_executor_queue_wait_seconds", "Time a model job waited for an executor worker", labels=("job",),
+)
+RUN_SECONDS = REGISTRY.histogram(
+    "fraudpulse_executor_run_seconds", "Time a model job ran on an executor worker", labels=("job",),
+)
+
+# Jobs available inside process-pool workers, filled by _init_process
+_JOBS: dict[str, Callable] = {}
+# Metrics recorded by the jobs themselves; process workers return them with each result
+_FORWARDED = (STAGE_SECONDS, STAGE_ROWS, TRANSACTIONS_SCORED)
+_forward_metrics = False
+
+
+def limit_threads(threads: int):
+    """Cap BLAS/OpenMP pools (and torch, if loaded) for this process."""
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=threads)
+    except ImportError:
+        pass
+    import sys
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+
+
+def _init_process(cache_dir: str, threads: int):
+    global _forward_metrics
+    _forward_metrics = True
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    from pathlib import Path
+    from services.predictor import FraudPredictor
+    from services.explainer import ShapExplainer
+
+    predictor = FraudPredictor(cache_dir=Path(cache_dir))
+    explainer = ShapExplainer(forest=predictor.forest)
+    _JOBS.update(predict_batch=predictor.predict_batch, explain_batch=explainer.explain_batch)
+    limit_threads(threads)
+
+
+def _run_job(job: str, args: tuple, kwargs: dict) -> tuple[float, float, object, list | None]:
+    # Wall-clock stamps so waits can be measured across processes
+    started = time.time()
+    result = _JOBS[job](*args, **kwargs)
+    finished = time.time()
+    # A process worker runs one job at a time, so everything recorded since the last drain is this job's
+    metrics = [metric.drain() for metric in _FORWARDED] if _forward_metrics else None
+    return started, finished, result, metrics
+
+
+class ModelExecutor:
+    """Runs named model jobs on a sized thread or process pool."""
+
+    def __init__(
+        self,
+        jobs: dict[str, Callable],
+        kind: str = MODEL_EXECUTOR,
+        workers: int = MODEL_WORKERS,
+        threads: int = MODEL_THREADS,
+        cache_dir=None,
+    ):
+        self.kind = kind
+        self.workers = workers
+        self.threads = threads
+        self.pending = 0
+        self.completed = 0
+
+        if kind == "thread":
+            _JOBS.update(jobs)
+            limit_threads(threads)
+            self._pool: Executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="model")
+        elif kind == "process":
+            if cache_dir is None:
+                raise ValueError("process executor needs the dataset cache_dir for shared model arrays")
+            # Spawned, not forked: the parent has an event loop and model threads running
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_process, initargs=(str(cache_dir), threads),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            raise ValueError(f"Unknown MODEL_EXECUTOR: {kind}")
+        print(f"[*] Model executor: {kind} x{workers}, {threads} BLAS/torch thread(s) each")
+
+    async def run(self, job: str, *args, **kwargs):
+        """Run a named job off the event loop and return its result."""
+        loop = asyncio.get_running_loop()
+        submitted = time.time()
+        self.pending += 1
+        try:
+            started, finished, result, metrics = await loop.run_in_executor(self._pool, _run_job, job, args, kwargs)
+        finally:
+            self.pending -= 1
+        if metrics is not None:
+            for metric, series in zip(_FORWARDED, metrics):
+                metric.merge(series)
+        QUEUE_WAIT_SECONDS.observe(max(started - submitted, 0.0), job=job)
+        RUN_SECONDS.observe(finished - started, job=job)
+        self.completed += 1
+        return result
+
+    async def warm_up(self, X):
+        """Start every pool worker (process workers load their models) before traffic arrives."""
+        await asyncio.gather(*[self.run("predict_batch", X) for _ in range(self.workers)])
+
+    def bind(self, job: str) -> Callable:
+        """Async callable running `job`, e.g. as a MicroBatcher batch function."""
+        async def call(*args, **kwargs):
+            return await self.run(job, *args, **kwargs)
+        return call
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "threads_per_worker": self.threads,
+            "pending": self.pending,
+            "completed": self.completed,
+        }
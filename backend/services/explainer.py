@@ -1,23 +1,34 @@
 """
 SHAP Explainability Service.
 Computes SHAP values for individual transactions using TreeExplainer on Isolation Forest.
+An opt-in approximate mode (SHAP_APPROXIMATE=1, or approximate=True per call)
+uses path attributions from the flattened forest instead: same base value and
+prediction, 20-80x cheaper, with top-feature ranks close to exact SHAP
+(see benchmarks/attribution_agreement.py).
 """
 
 import os
 import pickle
 import numpy as np
+from services.forest import FlatIsolationForest
+from services.metrics import STAGE_SECONDS, STAGE_ROWS
+from services.preprocessing import FEATURE_NAMES
 
 MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "models")
 
-# Feature names for the credit card dataset
-FEATURE_NAMES = ["Time"] + [f"V{i}" for i in range(1, 29)] + ["Amount"]
+SHAP_APPROXIMATE = os.getenv("SHAP_APPROXIMATE", "0").lower() in ("1", "true", "yes")
+
+FEATURE_NAME_ARRAY = np.array(FEATURE_NAMES)
 
 
 class ShapExplainer:
     """Computes SHAP values for transaction explainability."""
 
-    def __init__(self):
+    def __init__(self, approximate: bool = SHAP_APPROXIMATE, forest: FlatIsolationForest | None = None):
+        self.approximate = approximate
         self.explainer = None
+        # Reuse the predictor's flattened forest when given (shared, memory-mapped)
+        self.forest = forest
         self._load()
 
     def _load(self):
@@ -29,7 +40,9 @@ class ShapExplainer:
             model = pickle.load(f)
 
         self.explainer = shap.TreeExplainer(model)
-        print("[*] SHAP TreeExplainer loaded")
+        if self.forest is None:
+            self.forest = FlatIsolationForest(model)
+        print(f"[*] SHAP TreeExplainer loaded (approximate={self.approximate})")
 
     def explain(self, features: np.ndarray) -> dict:
         """
@@ -41,28 +54,75 @@ class ShapExplainer:
         Returns:
             dict with base_value, prediction, and per-feature SHAP values
         """
-        features_2d = features.reshape(1, -1)
-        shap_values = self.explainer.shap_values(features_2d)
-
-        # shap_values is array of shape (1, n_features)
-        sv = shap_values[0]
-        base_value = float(self.explainer.expected_value)
-
-        # Build per-feature breakdown
-        shap_list = []
-        for i, name in enumerate(FEATURE_NAMES):
-            if i < len(sv):
-                shap_list.append({
-                    "feature": name,
-                    "value": round(float(features[i]), 4),
-                    "shap_value": round(float(sv[i]), 6),
-                })
-
-        # Sort by absolute SHAP value (most influential first)
-        shap_list.sort(key=lambda x: abs(x["shap_value"]), reverse=True)
-
-        return {
-            "base_value": round(base_value, 6),
-            "prediction": round(base_value + sum(s["shap_value"] for s in shap_list), 6),
-            "shap_values": shap_list,
-        }
+        return self.explain_batch(features.reshape(1, -1))[0]
+
+    def explain_batch(
+        self,
+        X: np.ndarray,
+        top_k: int | None = None,
+        compact: bool = False,
+        approximate: bool | None = None,
+    ):
+        """
+        Compute SHAP values for a matrix of transactions in one TreeExplainer call.
+
+        Args:
+            X: numpy array of shape (n_rows, n_features)
+            top_k: keep only the k most influential features per row (all if None)
+            compact: return columnar arrays instead of per-row dicts
+            approximate: use forest path attributions (defaults to self.approximate)
+
+        Returns:
+            list of explain() results, one per row — or, if compact, a dict with
+            base_value, prediction (n,), and (n, k) feature/value/shap_value arrays
+        """
+        X = np.atleast_2d(X)
+        approximate = self.approximate if approximate is None else approximate
+        stage = "shap_approx" if approximate else "shap"
+        with STAGE_SECONDS.time(stage=stage):
+            if approximate:
+                sv = np.round(self.forest.path_contributions(X), 6)
+                base_value = self.forest.expected_value
+            else:
+                sv = np.round(np.asarray(self.explainer.shap_values(X), dtype=np.float64), 6)
+                base_value = float(self.explainer.expected_value)
+        STAGE_ROWS.inc(len(X), stage=stage)
+        prediction = np.round(base_value + sv.sum(axis=1), 6)
+
+        # Most influential first (by absolute SHAP value)
+        order = _top_k_indices(np.abs(sv), top_k)
+        top_features = FEATURE_NAME_ARRAY[order]
+        top_values = np.take_along_axis(np.round(X.astype(np.float64), 4), order, axis=1)
+        top_shap = np.take_along_axis(sv, order, axis=1)
+
+        if compact:
+            return {
+                "base_value": round(base_value, 6),
+                "prediction": prediction,
+                "feature": top_features,
+                "value": top_values,
+                "shap_value": top_shap,
+            }
+
+        return [
+            {
+                "base_value": round(base_value, 6),
+                "prediction": pred,
+                "shap_values": [
+                    {"feature": f, "value": v, "shap_value": sh}
+                    for f, v, sh in zip(names, values, shaps)
+                ],
+            }
+            for pred, names, values, shaps in zip(
+                prediction.tolist(), top_features.tolist(), top_values.tolist(), top_shap.tolist(),
+            )
+        ]
+
+
+def _top_k_indices(magnitude: np.ndarray, k: int | None) -> np.ndarray:
+    """Per-row column indices of the k largest magnitudes, largest first."""
+    if k is None or k >= magnitude.shape[1]:
+        return np.argsort(-magnitude, axis=1, kind="stable")
+    candidates = np.argpartition(-magnitude, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(magnitude, candidates, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1)
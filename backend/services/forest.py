@@ -0,0 +1,186 @@
+"""
+Flattened Isolation Forest.
+Copies the fitted sklearn trees into concatenated node arrays so a whole
+batch walks all trees at once in vectorized NumPy, one level per step.
+Scores match IsolationForest.score_samples / decision_function.
+
+path_contributions() gives a cheap approximate attribution (Saabas-style):
+each split along a row's path credits its feature with the change in
+expected path length, so base value + contributions = the row's mean
+path length — the same quantity TreeExplainer explains.
+
+save()/load() persist the node arrays as .npy files; load() memory-maps
+them so every worker process shares one copy through the page cache.
+"""
+
+import os
+import json
+import shutil
+import numpy as np
+from pathlib import Path
+
+# Node arrays written by save(); scalars go to meta.json
+ARRAY_NAMES = ("feature", "threshold", "children", "path_length", "roots", "node_value")
+SCALAR_NAMES = ("offset", "max_depth", "denominator", "n_features")
+
+
+def _average_path_length(n_samples: np.ndarray) -> np.ndarray:
+    """Average path length of an unsuccessful BST search over n samples (same as sklearn)."""
+    n = np.asarray(n_samples, dtype=np.float64)
+    result = np.zeros_like(n)
+    result[n == 2] = 1.0
+    deep = n > 2
+    result[deep] = 2.0 * (np.log(n[deep] - 1.0) + np.euler_gamma) - 2.0 * (n[deep] - 1.0) / n[deep]
+    return result
+
+
+def _node_depths(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Depth of every node counted from 1 at the root (as Tree.compute_node_depths)."""
+    depths = np.ones(len(left), dtype=np.float64)
+    frontier = np.array([0])
+    while frontier.size:
+        children = np.concatenate([left[frontier], right[frontier]])
+        parents = np.concatenate([frontier, frontier])
+        keep = children >= 0
+        depths[children[keep]] = depths[parents[keep]] + 1
+        frontier = children[keep]
+    return depths
+
+
+class FlatIsolationForest:
+    """Array-backed copy of a fitted IsolationForest for batched scoring."""
+
+    def __init__(self, model, chunk_size: int = 256):
+        self.chunk_size = chunk_size
+        self.offset = float(model.offset_)
+        # When every feature is used, sklearn fits and scores each tree on X directly
+        subsample = model._max_features != model.n_features_in_
+
+        features, thresholds, left, right, path_lengths, roots = [], [], [], [], [], []
+        node_depths, node_samples = [], []
+        base = 0
+        max_depth = 0
+        for tree, tree_features in zip(model.estimators_, model.estimators_features_):
+            t = tree.tree_
+            is_leaf = t.children_left < 0
+            node_ids = np.arange(t.node_count) + base
+            depths = _node_depths(t.children_left, t.children_right)
+
+            feature = np.asarray(tree_features)[t.feature] if subsample else t.feature
+            # Leaves point at themselves and always compare true, so extra steps are no-ops
+            features.append(np.where(is_leaf, 0, feature))
+            thresholds.append(np.where(is_leaf, np.inf, t.threshold))
+            left.append(np.where(is_leaf, node_ids, t.children_left + base))
+            right.append(np.where(is_leaf, node_ids, t.children_right + base))
+            path_lengths.append(depths + _average_path_length(t.n_node_samples) - 1.0)
+            roots.append(base)
+            node_depths.append(depths)
+            node_samples.append(t.n_node_samples)
+
+            base += t.node_count
+            max_depth = max(max_depth, int(depths.max()) - 1)
+
+        self.feature = np.concatenate(features).astype(np.intp)
+        self.threshold = np.concatenate(thresholds).astype(np.float64)
+        # Interleaved [left, right] pairs: child of node n is children[2n + went_right]
+        self.children = np.stack([np.concatenate(left), np.concatenate(right)], axis=1).ravel().astype(np.intp)
+        self.path_length = np.concatenate(path_lengths)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.max_depth = max_depth
+        self.denominator = len(roots) * float(_average_path_length(np.array([model._max_samples]))[0])
+        self.n_features = model.n_features_in_
+
+        # Expected path length under each node (sample-weighted mean of its leaves),
+        # filled bottom-up one level at a time
+        depth = np.concatenate(node_depths)
+        samples = np.concatenate(node_samples).astype(np.float64)
+        self.node_value = self.path_length.copy()
+        internal = self.children[0::2] != np.arange(len(self.feature))
+        for level in range(max_depth, 0, -1):
+            nodes = np.flatnonzero(internal & (depth == level))
+            lefts, rights = self.children[2 * nodes], self.children[2 * nodes + 1]
+            self.node_value[nodes] = (
+                samples[lefts] * self.node_value[lefts] + samples[rights] * self.node_value[rights]
+            ) / samples[nodes]
+
+    def save(self, path: Path):
+        """Write the node arrays to a directory (replaced atomically)."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        for name in ARRAY_NAMES:
+            np.save(tmp / f"{name}.npy", getattr(self, name))
+        (tmp / "meta.json").write_text(json.dumps({name: getattr(self, name) for name in SCALAR_NAMES}))
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path, chunk_size: int = 256) -> "FlatIsolationForest":
+        """Memory-map a forest written by save()."""
+        path = Path(path)
+        forest = cls.__new__(cls)
+        forest.chunk_size = chunk_size
+        for name, value in json.loads((path / "meta.json").read_text()).items():
+            setattr(forest, name, value)
+        for name in ARRAY_NAMES:
+            setattr(forest, name, np.load(path / f"{name}.npy", mmap_mode="r"))
+        return forest
+
+    @property
+    def expected_value(self) -> float:
+        """Mean path length over the training data (the attribution base value)."""
+        return float(self.node_value[self.roots].mean())
+
+    def score_samples(self, X: np.ndarray) -> np.ndarray:
+        """Opposite of the anomaly score (lower = more abnormal), as in sklearn."""
+        X = np.asarray(X, dtype=np.float32)
+        depths = np.concatenate([
+            self._depths(X[i:i + self.chunk_size]) for i in range(0, len(X), self.chunk_size)
+        ]) if len(X) else np.zeros(0)
+        if self.denominator == 0:
+            return -np.ones_like(depths)
+        return -(2.0 ** (-depths / self.denominator))
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        """score_samples shifted by the fitted offset; negative = outlier."""
+        return self.score_samples(X) - self.offset
+
+    def path_contributions(self, X: np.ndarray) -> np.ndarray:
+        """
+        Approximate per-feature attributions of the mean path length.
+
+        Returns:
+            (n_rows, n_features) array; negative = shorter path = more anomalous
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if not len(X):
+            return np.zeros((0, self.n_features))
+        return np.concatenate([
+            self._contributions(X[i:i + self.chunk_size]) for i in range(0, len(X), self.chunk_size)
+        ])
+
+    def _contributions(self, X: np.ndarray) -> np.ndarray:
+        n_rows, n_trees = len(X), len(self.roots)
+        # Flat (row, feature) bucket for every (row, tree) step
+        row_base = np.arange(n_rows)[:, None] * self.n_features
+        totals = np.zeros(n_rows * self.n_features)
+
+        node = np.broadcast_to(self.roots, (n_rows, n_trees)).copy()
+        for _ in range(self.max_depth):
+            feature = self.feature[node]
+            values = np.take_along_axis(X, feature, axis=1)
+            child = self.children[2 * node + (values > self.threshold[node])]
+            # Leaves loop onto themselves, so they add zero
+            delta = self.node_value[child] - self.node_value[node]
+            totals += np.bincount((row_base + feature).ravel(), weights=delta.ravel(), minlength=len(totals))
+            node = child
+        return totals.reshape(n_rows, self.n_features) / n_trees
+
+    def _depths(self, X: np.ndarray) -> np.ndarray:
+        # Every row starts at every tree's root; one step descends one level in all trees
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            values = np.take_along_axis(X, self.feature[node], axis=1)
+            node = self.children[2 * node + (values > self.threshold[node])]
+        return self.path_length[node].sum(axis=1)
@@ -0,0 +1,102 @@
+"""
+Stream Hub Service.
+Runs a single background producer over the TransactionStreamer so every
+transaction is scored and counted once, then fans it out to any number of
+WebSocket subscribers. Each subscriber reads from its own bounded queue;
+a slow client drops its oldest pending transactions instead of stalling
+the producer or the other clients. In-process consumers (e.g. the SHAP
+precomputer) attach as taps: callbacks run on every published
+transaction that are not counted as subscribers.
+"""
+
+import asyncio
+from typing import Callable
+
+
+class Subscription:
+    """One client's cursor into the live feed."""
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def push(self, tx: dict):
+        """Enqueue without blocking; evict the oldest pending item when full."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(tx)
+
+    async def get(self) -> dict:
+        return await self.queue.get()
+
+    async def get_batch(self, limit: int) -> list[dict]:
+        """Wait for one transaction, then take whatever else is already queued (up to `limit`)."""
+        batch = [await self.queue.get()]
+        while len(batch) < limit and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+
+class StreamHub:
+    """Fans out transactions from one producer task to many subscribers."""
+
+    def __init__(self, streamer, queue_size: int = 256):
+        self.streamer = streamer
+        self.queue_size = queue_size
+        self.subscribers: set[Subscription] = set()
+        # Internal consumers; must not block
+        self.taps: list[Callable[[dict], None]] = []
+        self._task: asyncio.Task | None = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self.subscribers)
+
+    def subscribe(self) -> Subscription:
+        sub = Subscription(self.queue_size)
+        self.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        self.subscribers.discard(sub)
+
+    def add_tap(self, fn: Callable[[dict], None]):
+        self.taps.append(fn)
+
+    def remove_tap(self, fn: Callable[[dict], None]):
+        if fn in self.taps:
+            self.taps.remove(fn)
+
+    def publish(self, tx: dict):
+        for sub in self.subscribers:
+            sub.push(tx)
+        for fn in self.taps:
+            fn(tx)
+
+    def start(self):
+        """Start the producer on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._produce())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _produce(self):
+        # Polling clients read the streamer's buffer, so the feed runs even with no subscribers
+        while True:
+            try:
+                async for batch in self.streamer.stream_batches():
+                    for tx in batch:
+                        self.publish(tx)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[!] Stream producer error: {e}")
+                await asyncio.sleep(1.0)
@@ -0,0 +1,218 @@
+"""
+Rolling Live Statistics.
+Sliding-window aggregates of the live feed over the last 1m / 5m / 1h
+(STATS_WINDOWS), independent of the demo cycle's cumulative counters.
+
+Each window is a ring of STATS_BUCKETS time buckets plus running totals.
+A batch of transactions is added to the current bucket and to the totals.
+When the ring advances past a bucket, that bucket is subtracted from the
+totals and cleared. Updates are O(1) per batch (O(distinct sketch keys)
+for the quantile sketches), and reading a window touches only its totals.
+A window slides in bucket-sized steps, e.g. one second for 1m.
+
+Combined confidence and amount quantiles come from DDSketch-style
+log-bucketed sketches. Their results are within STATS_SKETCH_ACCURACY
+relative error, and they can be added and subtracted bucket by bucket.
+"""
+
+import os
+import math
+import time
+import numpy as np
+
+# Window names: <n>s, <n>m or <n>h
+STATS_WINDOWS = os.getenv("STATS_WINDOWS") or "1m,5m,1h"
+STATS_BUCKETS = int(os.getenv("STATS_BUCKETS") or 60)
+STATS_SKETCH_ACCURACY = float(os.getenv("STATS_SKETCH_ACCURACY") or 0.01)
+
+RISK_LEVELS = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+QUANTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+# Counter vector layout per bucket
+COUNT, FLAGGED, CORRECT, BLOCKED, RISK_SUM = range(5)
+RISK_OFFSET = 5
+N_COUNTERS = RISK_OFFSET + len(RISK_LEVELS)
+
+_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+def parse_windows(spec: str) -> dict[str, float]:
+    """'1m,5m,1h' → {'1m': 60.0, '5m': 300.0, '1h': 3600.0}"""
+    windows = {}
+    for name in (part.strip() for part in spec.split(",") if part.strip()):
+        if name[-1] not in _UNITS:
+            raise ValueError(f"Invalid STATS_WINDOWS entry: {name!r}")
+        windows[name] = float(name[:-1]) * _UNITS[name[-1]]
+    return windows
+
+
+class QuantileSketch:
+    """Log-bucketed histogram of non-negative values (DDSketch-style)."""
+
+    # Values at or below this count as zero
+    MIN_VALUE = 1e-9
+
+    def __init__(self, relative_accuracy: float = STATS_SKETCH_ACCURACY):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add_many(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        positive = values[values > self.MIN_VALUE]
+        self.zeros += len(values) - len(positive)
+        self.count += len(values)
+        if len(positive):
+            keys, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma).astype(np.int64), return_counts=True)
+            bins = self.bins
+            for k, c in zip(keys.tolist(), counts.tolist()):
+                bins[k] = bins.get(k, 0) + c
+
+    def merge(self, other: "QuantileSketch", sign: int = 1):
+        """Add (sign=1) or remove (sign=-1) another sketch's values."""
+        self.zeros += sign * other.zeros
+        self.count += sign * other.count
+        bins = self.bins
+        for k, c in other.bins.items():
+            total = bins.get(k, 0) + sign * c
+            if total:
+                bins[k] = total
+            else:
+                del bins[k]
+
+    def clear(self):
+        self.bins.clear()
+        self.zeros = 0
+        self.count = 0
+
+    def quantiles(self, qs: dict[str, float]) -> dict[str, float] | None:
+        """Named quantiles in one pass over the sorted bins, or None when empty."""
+        if self.count == 0:
+            return None
+        ranks = sorted((q * (self.count - 1), name) for name, q in qs.items())
+        out = {}
+        seen = self.zeros
+        i = 0
+        while i < len(ranks) and ranks[i][0] < seen:
+            out[ranks[i][1]] = 0.0
+            i += 1
+        for k in sorted(self.bins):
+            seen += self.bins[k]
+            while i < len(ranks) and ranks[i][0] < seen:
+                # Midpoint of the bin (gamma^(k-1), gamma^k], within the relative accuracy
+                out[ranks[i][1]] = round(2 * self.gamma ** k / (self.gamma + 1), 4)
+                i += 1
+        return {name: out[name] for name in qs}
+
+
+class _Bucket:
+    def __init__(self, accuracy: float):
+        self.counters = np.zeros(N_COUNTERS)
+        self.confidence = QuantileSketch(accuracy)
+        self.amount = QuantileSketch(accuracy)
+
+    def add(self, counters: np.ndarray, confidence: np.ndarray, amount: np.ndarray):
+        self.counters += counters
+        self.confidence.add_many(confidence)
+        self.amount.add_many(amount)
+
+    def merge(self, other: "_Bucket", sign: int = 1):
+        self.counters += sign * other.counters
+        self.confidence.merge(other.confidence, sign)
+        self.amount.merge(other.amount, sign)
+
+    def clear(self):
+        self.counters[:] = 0
+        self.confidence.clear()
+        self.amount.clear()
+
+
+class RollingWindow:
+    """Ring of time buckets with running totals over the last `span` seconds."""
+
+    def __init__(self, span: float, n_buckets: int = STATS_BUCKETS, accuracy: float = STATS_SKETCH_ACCURACY):
+        self.span = span
+        self.n_buckets = n_buckets
+        self.width = span / n_buckets
+        self._buckets = [_Bucket(accuracy) for _ in range(n_buckets)]
+        self._totals = _Bucket(accuracy)
+        self._head: int | None = None  # absolute index of the current bucket
+
+    def _advance(self, now: float) -> _Bucket:
+        epoch = int(now // self.width)
+        if self._head is None or epoch - self._head >= self.n_buckets:
+            # First use, or idle for longer than the window: everything has expired
+            for bucket in self._buckets:
+                bucket.clear()
+            self._totals.clear()
+        else:
+            while self._head < epoch:
+                self._head += 1
+                expired = self._buckets[self._head % self.n_buckets]
+                self._totals.merge(expired, -1)
+                expired.clear()
+            if self._totals.counters[COUNT] == 0:
+                self._totals.counters[:] = 0  # drop float residue from the running sums
+        self._head = epoch
+        return self._buckets[epoch % self.n_buckets]
+
+    def add(self, now: float, counters: np.ndarray, confidence: np.ndarray, amount: np.ndarray):
+        self._advance(now).add(counters, confidence, amount)
+        self._totals.add(counters, confidence, amount)
+
+    def summary(self, now: float, started: float) -> dict:
+        self._advance(now)
+        c = self._totals.counters
+        total = int(c[COUNT])
+        covered = min(self.span, max(now - started, self.width))
+        return {
+            "window_seconds": self.span,
+            "total_transactions": total,
+            "transactions_per_second": round(total / covered, 2),
+            "flagged_transactions": int(c[FLAGGED]),
+            "fraud_rate": round(c[FLAGGED] / total, 6) if total else 0.0,
+            "model_accuracy": round(c[CORRECT] / total, 4) if total else 0.0,
+            "blocked_amount": round(float(c[BLOCKED]), 2),
+            "avg_risk_score": round(c[RISK_SUM] / total, 4) if total else 0.0,
+            "risk_distribution": {level: int(c[RISK_OFFSET + i]) for i, level in enumerate(RISK_LEVELS)},
+            "confidence_quantiles": self._totals.confidence.quantiles(QUANTILES),
+            "amount_quantiles": self._totals.amount.quantiles(QUANTILES),
+        }
+
+
+class LiveWindows:
+    """The configured rolling windows, fed one batch of transactions at a time."""
+
+    def __init__(self, windows: str = STATS_WINDOWS, n_buckets: int = STATS_BUCKETS, clock=time.monotonic):
+        self.clock = clock
+        self.started = clock()
+        self.windows = {name: RollingWindow(span, n_buckets) for name, span in parse_windows(windows).items()}
+
+    def add_batch(
+        self,
+        risk_level: np.ndarray,
+        recommendation: np.ndarray,
+        confidence: np.ndarray,
+        amount: np.ndarray,
+        actual: np.ndarray,
+    ):
+        """Record one batch of scored transactions (columnar, string labels)."""
+        flagged = (risk_level == "HIGH") | (risk_level == "CRITICAL")
+        counters = np.zeros(N_COUNTERS)
+        counters[COUNT] = len(risk_level)
+        counters[FLAGGED] = flagged.sum()
+        counters[CORRECT] = (flagged == (actual == 1)).sum()
+        counters[BLOCKED] = np.abs(amount[recommendation == "BLOCK"]).sum()
+        counters[RISK_SUM] = confidence.sum()
+        for i, level in enumerate(RISK_LEVELS):
+            counters[RISK_OFFSET + i] = (risk_level == level).sum()
+
+        now = self.clock()
+        for window in self.windows.values():
+            window.add(now, counters, confidence, np.abs(amount))
+
+    def summary(self) -> dict:
+        now = self.clock()
+        return {name: window.summary(now, self.started) for name, window in self.windows.items()}
@@ -0,0 +1,127 @@
+"""
+LLM Explanation Cache.
+Finished explanations are kept in an LRU keyed by (transaction id, prompt
+hash) and replayed chunk by chunk on a repeat request. Concurrent requests
+for the same key share one upstream stream (single flight): the first
+starts it, later ones attach and get every chunk so far replayed, then
+follow live. Failed generations are streamed but never cached. When the
+last reader goes away the upstream generation is cancelled.
+"""
+
+import os
+import asyncio
+from typing import AsyncIterator, Callable
+from services.shap_cache import LRUCache
+from services.llm_service import build_prompt, generate_explanation, prompt_hash, unavailable_chunks
+
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE") or 1024)
+
+
+class ExplanationCache(LRUCache):
+    """LRU of finished explanations (lists of chunks) keyed by (tx id, prompt hash)."""
+
+    def __init__(self, max_size: int = LLM_CACHE_SIZE):
+        super().__init__(max_size)
+
+
+class Flight:
+    """One upstream generation; any number of readers replay its chunks."""
+
+    def __init__(self):
+        self.chunks: list[str] = []
+        self.done = False
+        self.failed = False
+        self.readers = 0
+        self._changed = asyncio.Condition()
+        self.task: asyncio.Task | None = None
+
+    async def append(self, chunk: str):
+        async with self._changed:
+            self.chunks.append(chunk)
+            self._changed.notify_all()
+
+    async def finish(self):
+        async with self._changed:
+            self.done = True
+            self._changed.notify_all()
+
+    async def replay(self) -> AsyncIterator[str]:
+        """Every chunk from the start, then live ones until the flight finishes."""
+        i = 0
+        while True:
+            while i < len(self.chunks):
+                yield self.chunks[i]
+                i += 1
+            if self.done:
+                return
+            async with self._changed:
+                await self._changed.wait_for(lambda: self.done or len(self.chunks) > i)
+
+
+class ExplanationBroker:
+    """Serves explanations from cache, joining or starting a single upstream flight on a miss."""
+
+    def __init__(self, cache: ExplanationCache | None = None, generate: Callable = generate_explanation):
+        self.cache = cache if cache is not None else ExplanationCache()
+        self.generate = generate
+        self.inflight: dict[tuple, Flight] = {}
+        self.upstream_calls = 0
+        self.deduplicated = 0
+
+    async def stream(self, transaction_data: dict, shap_top5: list[dict]) -> AsyncIterator[str]:
+        prompt = build_prompt(transaction_data, shap_top5)
+        key = (transaction_data.get("id"), prompt_hash(prompt))
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            for chunk in cached:
+                yield chunk
+            return
+
+        flight = self.inflight.get(key)
+        if flight is None:
+            flight = Flight()
+            self.inflight[key] = flight
+            # Runs as its own task so a leader disconnecting doesn't cut off followers
+            flight.task = asyncio.create_task(self._fly(key, flight, transaction_data, shap_top5, prompt))
+            self.upstream_calls += 1
+        else:
+            self.deduplicated += 1
+
+        flight.readers += 1
+        try:
+            async for chunk in flight.replay():
+                yield chunk
+        finally:
+            flight.readers -= 1
+            if flight.readers == 0 and not flight.done:
+                # Nobody is listening any more — stop paying for the upstream stream
+                if self.inflight.get(key) is flight:
+                    del self.inflight[key]
+                flight.task.cancel()
+
+    async def _fly(self, key: tuple, flight: Flight, transaction_data: dict, shap_top5: list[dict], prompt: str):
+        try:
+            async for chunk in self.generate(transaction_data, shap_top5, prompt):
+                await flight.append(chunk)
+        except asyncio.CancelledError:
+            flight.failed = True
+            raise
+        except Exception as e:
+            flight.failed = True
+            for chunk in unavailable_chunks(transaction_data, e):
+                await flight.append(chunk)
+        finally:
+            if not flight.failed:
+                self.cache.put(key, list(flight.chunks))
+            if self.inflight.get(key) is flight:
+                del self.inflight[key]
+            await flight.finish()
+
+    def stats(self) -> dict:
+        return {
+            **self.cache.stats(),
+            "inflight": len(self.inflight),
+            "upstream_calls": self.upstream_calls,
+            "deduplicated": self.deduplicated,
+        }
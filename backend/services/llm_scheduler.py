@@ -0,0 +1,155 @@
+"""
+LLM Scheduler.
+Bounds how many upstream LLM streams run at once. Requests beyond the limit
+wait in a priority queue (CRITICAL first, then HIGH, ...; FIFO within a
+level); a full queue is refused immediately. Each stream has a
+time-to-first-token deadline and a total deadline counted from when it was
+queued. A missed deadline raises LLMUnavailable, which callers turn into
+the rule-based fallback. Closing the stream (client gone) cancels the
+upstream call and frees the slot.
+"""
+
+import os
+import heapq
+import itertools
+import asyncio
+from collections import deque
+from typing import AsyncIterator, Callable
+from services.metrics import LLM_QUEUE_WAIT_SECONDS
+
+LLM_MAX_CONCURRENT = int(os.getenv("LLM_MAX_CONCURRENT") or 8)
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE") or 64)
+LLM_TTFT_TIMEOUT = float(os.getenv("LLM_TTFT_TIMEOUT") or 10.0)
+LLM_TOTAL_TIMEOUT = float(os.getenv("LLM_TOTAL_TIMEOUT") or 60.0)
+
+PRIORITIES = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3}
+
+# Recent queue waits kept for percentile reporting
+WAIT_WINDOW = 1024
+
+
+class LLMUnavailable(Exception):
+    """The scheduler could not get a complete answer from the model in time."""
+
+
+class LLMScheduler:
+    """Priority-ordered concurrency limiter with deadlines around an LLM chunk generator."""
+
+    def __init__(
+        self,
+        generate: Callable,
+        max_concurrent: int = LLM_MAX_CONCURRENT,
+        max_queue: int = LLM_MAX_QUEUE,
+        ttft_timeout: float = LLM_TTFT_TIMEOUT,
+        total_timeout: float = LLM_TOTAL_TIMEOUT,
+    ):
+        self.generate = generate
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.ttft_timeout = ttft_timeout
+        self.total_timeout = total_timeout
+
+        self.active = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+        self.completed = 0
+        self.rejected = 0
+        self.ttft_timeouts = 0
+        self.total_timeouts = 0
+        self.cancelled = 0
+        self._waits: deque[float] = deque(maxlen=WAIT_WINDOW)
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def _acquire(self, priority: int, timeout: float):
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise LLMUnavailable("explanation queue is full")
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), future)
+        heapq.heappush(self._waiters, entry)
+        try:
+            # The slot is handed over by _release, already counted in self.active
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                self._release()  # granted just as we gave up
+            else:
+                future.cancel()
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            if isinstance(e, asyncio.TimeoutError):
+                self.total_timeouts += 1
+                raise LLMUnavailable(f"no model slot within {timeout:g}s") from None
+            raise
+
+    def _release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    async def stream(self, transaction_data: dict, *args) -> AsyncIterator[str]:
+        """Yield generate(transaction_data, *args) chunks within a model slot and the deadlines."""
+        loop = asyncio.get_running_loop()
+        queued_at = loop.time()
+        deadline = queued_at + self.total_timeout
+        priority = PRIORITIES.get(transaction_data.get("risk_level"), len(PRIORITIES))
+
+        await self._acquire(priority, self.total_timeout)
+        wait = loop.time() - queued_at
+        self._waits.append(wait)
+        LLM_QUEUE_WAIT_SECONDS.observe(wait)
+
+        chunks = self.generate(transaction_data, *args).__aiter__()
+        first = True
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                timeout = min(self.ttft_timeout, remaining) if first else remaining
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), max(timeout, 0))
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    if first and timeout < remaining:
+                        self.ttft_timeouts += 1
+                        raise LLMUnavailable(f"no first token within {self.ttft_timeout:g}s") from None
+                    self.total_timeouts += 1
+                    raise LLMUnavailable(f"explanation exceeded {self.total_timeout:g}s") from None
+                first = False
+                yield chunk
+            self.completed += 1
+        except (asyncio.CancelledError, GeneratorExit):
+            self.cancelled += 1
+            raise
+        finally:
+            # Closing the generator tears down the upstream HTTP stream
+            await chunks.aclose()
+            self._release()
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits)
+        return {
+            "active": self.active,
+            "max_concurrent": self.max_concurrent,
+            "queue_depth": self.queue_depth,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "ttft_timeouts": self.ttft_timeouts,
+            "total_timeouts": self.total_timeouts,
+            "cancelled": self.cancelled,
+            "wait_ms_avg": round(sum(waits) / len(waits) * 1e3, 2) if waits else 0.0,
+            "wait_ms_p95": round(waits[int(0.95 * (len(waits) - 1))] * 1e3, 2) if waits else 0.0,
+            "wait_ms_max": round(waits[-1] * 1e3, 2) if waits else 0.0,
+        }
@@ -1,21 +1,45 @@
 """
 LLM Service — Gemini 3.0 Flash Preview for natural language fraud alert explanations.
 Uses Server-Sent Events (SSE) for streaming output.
+One Gemini client (and its HTTP connection pool) is shared by every request;
+set_client() swaps in a local fake for tests, and GEMINI_BASE_URL points the
+real client at a stand-in server.
 """
 
 import os
+import time
+import hashlib
+import asyncio
 from google import genai
 from google.genai import types
 from dotenv import load_dotenv
+from services.metrics import LLM_TTFT_SECONDS, LLM_STREAM_SECONDS
 
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL") or "gemini-3-flash-preview"
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "")
+
+_client = None
 
 
 def get_client():
-    """Get Gemini client."""
-    return genai.Client(api_key=GEMINI_API_KEY)
+    """Shared Gemini client, built on first use (None without an API key)."""
+    global _client
+    if _client is None and GEMINI_API_KEY:
+        http_options = types.HttpOptions(base_url=GEMINI_BASE_URL) if GEMINI_BASE_URL else None
+        _client = genai.Client(api_key=GEMINI_API_KEY, http_options=http_options)
+    return _client
+
+
+def set_client(client):
+    """
+    Replace the shared client, e.g. with a fake exposing
+    client.aio.models.generate_content_stream(model=, contents=, config=).
+    """
+    global _client
+    _client = client
 
 
 SYSTEM_PROMPT = """You are FraudPulse AI, an expert fraud detection analyst working inside a real-time fraud monitoring dashboard.
@@ -73,43 +97,63 @@ Top 5 SHAP feature contributions (negative = pushes toward fraud, positive = pus
 Provide your complete fraud analysis now — include all 4 sections (Risk Assessment, Key Indicators, Model Agreement, Recommendation):"""
 
 
-async def stream_explanation(transaction_data: dict, shap_top5: list[dict]):
+def prompt_hash(prompt: str) -> str:
+    """Identifies everything the model sees, so a changed prompt never hits a stale cache entry."""
+    digest = hashlib.sha256()
+    for part in (GEMINI_MODEL, SYSTEM_PROMPT, prompt):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+async def generate_explanation(transaction_data: dict, shap_top5: list[dict], prompt: str | None = None):
     """
-    Generator that yields chunks of LLM explanation text.
-    Uses native async streaming to avoid blocking the event loop.
+    Yield explanation chunks straight from the model; errors propagate.
+    Without a client (no API key) yields the rule-based fallback word by word.
     """
-    import asyncio
-
-    if not GEMINI_API_KEY:
-        # Fallback for when no API key is set
+    client = get_client()
+    if client is None:
+        LLM_TTFT_SECONDS.observe(0.0, source="fallback")
         fallback = _generate_fallback(transaction_data)
         for word in fallback.split(" "):
             yield word + " "
         return
 
-    client = get_client()
-    prompt = build_prompt(transaction_data, shap_top5)
-
+    if prompt is None:
+        prompt = build_prompt(transaction_data, shap_top5)
+
+    start = time.perf_counter()
+    first = True
+    # Use native async streaming (client.aio) to prevent event loop blocking
+    # which was causing truncated explanations — especially on low-risk txns
+    async_response = await client.aio.models.generate_content_stream(
+        model=GEMINI_MODEL,
+        contents=prompt,
+        config=types.GenerateContentConfig(
+            system_instruction=SYSTEM_PROMPT,
+            max_output_tokens=4096,
+        ),
+    )
     try:
-        # Use native async streaming (client.aio) to prevent event loop blocking
-        # which was causing truncated explanations — especially on low-risk txns
-        async_response = await client.aio.models.generate_content_stream(
-            model="gemini-3-flash-preview",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                system_instruction=SYSTEM_PROMPT,
-                max_output_tokens=4096,
-            ),
-        )
         async for chunk in async_response:
             if chunk.text:
+                if first:
+                    LLM_TTFT_SECONDS.observe(time.perf_counter() - start, source="gemini")
+                    first = False
                 yield chunk.text
                 # Give the event loop breathing room between chunks
                 await asyncio.sleep(0)
-    except Exception as e:
-        yield f"[Analysis unavailable: {str(e)}] "
-        fallback = _generate_fallback(transaction_data)
-        yield fallback
+        LLM_STREAM_SECONDS.observe(time.perf_counter() - start, source="gemini")
+    finally:
+        # Stop reading (and free the pooled connection) as soon as we're closed or cancelled
+        aclose = getattr(async_response, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+def unavailable_chunks(transaction_data: dict, error: Exception) -> list[str]:
+    """What the analyst sees when the model call fails part-way."""
+    return [f"[Analysis unavailable: {str(error)}] ", _generate_fallback(transaction_data)]
 
 
 def _generate_fallback(transaction_data: dict) -> str:
@@ -0,0 +1,239 @@
+"""
+Metrics Service.
+Minimal Prometheus-style registry (counters, gauges, histograms) rendered
+in the text exposition format on /metrics. Metrics are process-wide
+module globals so the predictor, explainer, streamer and LLM path can
+record into them from worker threads without being handed a registry.
+Gauges and counters that already live elsewhere (cache hit counts,
+subscriber counts) are read through callbacks at scrape time.
+"""
+
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable
+
+# Seconds; spans sub-millisecond model scoring up to multi-second LLM streams
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def drain(self) -> dict:
+        """Take and reset every series (e.g. to ship a worker process's counts to the parent)."""
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+    def merge(self, values: dict):
+        """Add series taken with drain() from another registry."""
+        with self._lock:
+            for key, v in values.items():
+                self._values[key] = self._values.get(key, 0) + v
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(v)}" for key, v in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class CallbackMetric(_Metric):
+    """Counter or gauge whose value(s) are read from fn() at scrape time."""
+
+    def __init__(self, name: str, help: str, fn: Callable, kind: str = "gauge", labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self.kind = kind
+        self.fn = fn
+
+    def render(self) -> list[str]:
+        try:
+            value = self.fn()
+        except Exception:
+            return []
+        if value is None:
+            return []
+        # Labelled callbacks return {label value(s): number}
+        items = value.items() if isinstance(value, dict) else [((), value)]
+        lines = self.header()
+        for key, v in items:
+            key = key if isinstance(key, tuple) else (key,)
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(v)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # Per label set: [count per bucket (+Inf last)], sum
+        self._series: dict[tuple, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def drain(self) -> dict:
+        """Take and reset every series (e.g. to ship a worker process's observations to the parent)."""
+        with self._lock:
+            series, self._series = self._series, {}
+        return series
+
+    def merge(self, series: dict):
+        """Add series taken with drain() from another registry with the same buckets."""
+        with self._lock:
+            for key, (counts, total) in series.items():
+                mine = self._series.get(key)
+                if mine is None:
+                    mine = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+                for i, n in enumerate(counts):
+                    mine[0][i] += n
+                mine[1][0] += total[0]
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = [(key, list(counts), total[0]) for key, (counts, total) in self._series.items()]
+        lines = self.header()
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Ordered collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        # Re-registering a name replaces it (e.g. callbacks rebound on app restart)
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def callback(self, name: str, help: str, fn: Callable, kind: str = "gauge", labels: tuple[str, ...] = ()):
+        return self.register(CallbackMetric(name, help, fn, kind, labels))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ── Pipeline metrics shared across services ──
+STAGE_SECONDS = REGISTRY.histogram(
+    "fraudpulse_stage_seconds",
+    "Latency of each pipeline stage (feature_extraction, if_score, ae_score, shap, shap_approx, ws_send)",
+    labels=("stage",),
+)
+STAGE_ROWS = REGISTRY.counter(
+    "fraudpulse_stage_rows_total", "Rows processed by each batch-capable stage", labels=("stage",),
+)
+TRANSACTIONS_SCORED = REGISTRY.counter(
+    "fraudpulse_transactions_scored_total", "Transactions scored by FraudPredictor",
+)
+TRANSACTIONS_STREAMED = REGISTRY.counter(
+    "fraudpulse_transactions_streamed_total", "Transactions emitted on the live feed", labels=("risk_level",),
+)
+LLM_TTFT_SECONDS = REGISTRY.histogram(
+    "fraudpulse_llm_ttft_seconds", "Time from the LLM request to its first text chunk", labels=("source",),
+)
+LLM_STREAM_SECONDS = REGISTRY.histogram(
+    "fraudpulse_llm_stream_seconds", "Total time of an upstream LLM generation", labels=("source",),
+)
+LLM_QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "fraudpulse_llm_queue_wait_seconds", "Time an explanation waited for an LLM slot",
+)
@@ -6,35 +6,99 @@ combines scores into a unified risk assessment.
 
 import os
 import pickle
+import hashlib
 import numpy as np
-import torch
-from models.train import FraudAutoencoder
+from pathlib import Path
+from services.forest import FlatIsolationForest
+from services.autoencoder import AE_BACKEND, NumpyAutoencoder, load_autoencoder
+from services.metrics import STAGE_SECONDS, STAGE_ROWS, TRANSACTIONS_SCORED
 
 MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "models")
 
+# Combined-confidence cut-offs: < 0.25 LOW, < 0.45 MEDIUM, < 0.70 HIGH, else CRITICAL
+RISK_THRESHOLDS = np.array([0.25, 0.45, 0.70])
+RISK_LEVELS = np.array(["LOW", "MEDIUM", "HIGH", "CRITICAL"])
+RECOMMENDATIONS = np.array(["ALLOW", "REVIEW", "BLOCK", "BLOCK"])
+FRAUD_LABELS = np.array(["legitimate", "fraud"])
+
+# Output columns of predict_batch(), in response order
+PREDICTION_COLUMNS = (
+    "if_score", "if_label", "ae_reconstruction_error", "ae_label",
+    "combined_confidence", "risk_level", "recommendation",
+)
+# Label columns can be kept as int8 codes into these lookup arrays
+LABEL_CATEGORIES = {
+    "if_label": FRAUD_LABELS,
+    "ae_label": FRAUD_LABELS,
+    "risk_level": RISK_LEVELS,
+    "recommendation": RECOMMENDATIONS,
+}
+
 
 class FraudPredictor:
     """Loads both models and provides dual-model predictions."""
 
-    def __init__(self):
+    def __init__(self, ae_backend: str = AE_BACKEND, cache_dir: Path | None = None):
+        """
+        Args:
+            ae_backend: autoencoder inference backend (see services.autoencoder)
+            cache_dir: if given, the flattened forest (and numpy autoencoder weights)
+                are memory-mapped from here, written on first load, so worker
+                processes share their pages
+        """
+        self.ae_backend = ae_backend
+        self.cache_dir = cache_dir
         self._load_models()
 
     def _load_models(self):
         # Load Isolation Forest
         if_path = os.path.join(MODEL_DIR, "isolation_forest.pkl")
+        ae_path = os.path.join(MODEL_DIR, "autoencoder.pt")
+        self.fingerprint = _fingerprint(if_path, ae_path)
+        # Array-backed copy of the 200 trees: one vectorized walk per batch
+        self.forest = self._load_forest(if_path)
+
+        # Load Autoencoder (BatchNorm-folded inference engine, warmed up on load)
+        self.autoencoder, self.ae_threshold = self._load_autoencoder(ae_path)
+
+        print(f"[*] Both models loaded successfully (autoencoder backend: {self.ae_backend})")
+
+    def _load_forest(self, if_path: str) -> FlatIsolationForest:
+        forest_dir = self.cache_dir / f"forest-{self.fingerprint[:16]}" if self.cache_dir else None
+        if forest_dir is not None and (forest_dir / "meta.json").exists():
+            return FlatIsolationForest.load(forest_dir)
+
         with open(if_path, "rb") as f:
-            self.isolation_forest = pickle.load(f)
+            forest = FlatIsolationForest(pickle.load(f))
+        if forest_dir is not None:
+            try:
+                forest.save(forest_dir)
+                forest = FlatIsolationForest.load(forest_dir)
+            except OSError as e:
+                print(f"[!] Could not cache flattened forest: {e}")
+        return forest
+
+    def _load_autoencoder(self, ae_path: str):
+        ae_dir = None
+        if self.cache_dir is not None and self.ae_backend == "numpy":
+            ae_dir = self.cache_dir / f"autoencoder-{self.fingerprint[:16]}"
+            if (ae_dir / "meta.json").exists():
+                # No torch import needed at all on this path
+                return NumpyAutoencoder.load(ae_dir)
+
+        import torch
 
-        # Load Autoencoder
-        ae_path = os.path.join(MODEL_DIR, "autoencoder.pt")
         checkpoint = torch.load(ae_path, map_location="cpu", weights_only=False)
-        self.ae_threshold = checkpoint["threshold"]
-        input_dim = checkpoint["input_dim"]
-        self.autoencoder = FraudAutoencoder(input_dim=input_dim)
-        self.autoencoder.load_state_dict(checkpoint["model_state_dict"])
-        self.autoencoder.eval()
-
-        print("[*] Both models loaded successfully")
+        engine = load_autoencoder(
+            checkpoint, self.ae_backend, script_path=os.path.join(MODEL_DIR, "autoencoder_ts.pt"),
+        )
+        if ae_dir is not None:
+            try:
+                engine.save(ae_dir, checkpoint["threshold"])
+                return NumpyAutoencoder.load(ae_dir)
+            except OSError as e:
+                print(f"[!] Could not cache autoencoder weights: {e}")
+        return engine, checkpoint["threshold"]
 
     def predict(self, features: np.ndarray) -> dict:
         """
@@ -46,50 +110,92 @@ class FraudPredictor:
         Returns:
             dict with IF score, AE score, combined confidence, risk level, recommendation
         """
-        features_2d = features.reshape(1, -1)
+        return batch_to_records(self.predict_batch(features.reshape(1, -1)))[0]
+
+    def predict_batch(self, X: np.ndarray, encoded: bool = False) -> dict[str, np.ndarray]:
+        """
+        Run dual-model prediction on a batch of transactions.
+
+        One Isolation Forest traversal and one autoencoder forward pass
+        score every row; risk thresholds are applied as a vectorized step.
+
+        Args:
+            X: numpy array of shape (n_rows, n_features)
+            encoded: return label columns as int8 codes into LABEL_CATEGORIES
+
+        Returns:
+            dict of columnar arrays (one entry per row), same keys as predict()
+        """
+        X = np.atleast_2d(np.asarray(X))
 
         # ── Isolation Forest ──
-        if_raw_score = self.isolation_forest.decision_function(features_2d)[0]
-        if_pred = self.isolation_forest.predict(features_2d)[0]
+        # One pass over the flattened forest; decision_function < 0 (score below offset_)
+        # is exactly what IsolationForest.predict flags as -1
+        with STAGE_SECONDS.time(stage="if_score"):
+            if_raw = self.forest.decision_function(X)
         # Convert: more negative = more anomalous → normalize to 0-1 (1 = likely fraud)
-        if_score = max(0.0, min(1.0, -if_raw_score * 2 + 0.5))
-        if_label = "fraud" if if_pred == -1 else "legitimate"
+        if_score = np.clip(-if_raw * 2 + 0.5, 0.0, 1.0)
+        if_fraud = if_raw < 0
 
         # ── Autoencoder ──
-        with torch.no_grad():
-            x_tensor = torch.FloatTensor(features_2d)
-            reconstructed = self.autoencoder(x_tensor)
-            ae_error = torch.mean((x_tensor - reconstructed) ** 2).item()
+        with STAGE_SECONDS.time(stage="ae_score"):
+            ae_error = self.autoencoder.reconstruction_error(X).astype(np.float64)
 
         # Normalize AE score: error / threshold ratio, capped at 1
-        ae_score = min(1.0, ae_error / (self.ae_threshold * 2))
-        ae_label = "fraud" if ae_error > self.ae_threshold else "legitimate"
+        ae_score = np.minimum(1.0, ae_error / (self.ae_threshold * 2))
+        ae_fraud = ae_error > self.ae_threshold
 
         # ── Combined Score ──
         # Weighted: 40% IF, 60% AE (autoencoder is usually more precise for anomaly detection)
-        combined = 0.4 * if_score + 0.6 * ae_score
-        combined = round(combined, 4)
+        combined = np.round(0.4 * if_score + 0.6 * ae_score, 4)
 
         # ── Risk Level ──
-        if combined >= 0.70:
-            risk_level = "CRITICAL"
-            recommendation = "BLOCK"
-        elif combined >= 0.45:
-            risk_level = "HIGH"
-            recommendation = "BLOCK"
-        elif combined >= 0.25:
-            risk_level = "MEDIUM"
-            recommendation = "REVIEW"
-        else:
-            risk_level = "LOW"
-            recommendation = "ALLOW"
-
-        return {
-            "if_score": round(if_score, 4),
-            "if_label": if_label,
-            "ae_reconstruction_error": round(ae_error, 6),
-            "ae_label": ae_label,
+        level_idx = np.searchsorted(RISK_THRESHOLDS, combined, side="right")
+
+        TRANSACTIONS_SCORED.inc(len(X))
+        STAGE_ROWS.inc(len(X), stage="if_score")
+        STAGE_ROWS.inc(len(X), stage="ae_score")
+
+        batch = {
+            "if_score": np.round(if_score, 4),
+            "if_label": if_fraud.astype(np.int8),
+            "ae_reconstruction_error": np.round(ae_error, 6),
+            "ae_label": ae_fraud.astype(np.int8),
             "combined_confidence": combined,
-            "risk_level": risk_level,
-            "recommendation": recommendation,
+            "risk_level": level_idx.astype(np.int8),
+            "recommendation": level_idx.astype(np.int8),
         }
+        return batch if encoded else decode_labels(batch)
+
+    def predict_all(self, X: np.ndarray, batch_size: int = 8192) -> dict[str, np.ndarray]:
+        """
+        Score a whole feature matrix in fixed-size batches.
+
+        Returns:
+            encoded columnar arrays (see predict_batch), row-aligned with X
+        """
+        parts = [self.predict_batch(X[i:i + batch_size], encoded=True) for i in range(0, len(X), batch_size)]
+        return {key: np.concatenate([p[key] for p in parts]) for key in PREDICTION_COLUMNS}
+
+
+def _fingerprint(*paths: str) -> str:
+    """Content hash of the model files, used to invalidate cached predictions."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def decode_labels(batch: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """Replace int8 label codes with their string labels."""
+    return {
+        key: LABEL_CATEGORIES[key][values] if key in LABEL_CATEGORIES else values
+        for key, values in batch.items()
+    }
+
+
+def batch_to_records(batch: dict[str, np.ndarray]) -> list[dict]:
+    """Convert columnar predict_batch() output into per-row prediction dicts."""
+    columns = {key: values.tolist() for key, values in batch.items()}
+    return [dict(zip(columns, row)) for row in zip(*columns.values())]
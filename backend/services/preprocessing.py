@@ -0,0 +1,139 @@
+"""
+Feature Preprocessing Service.
+Applies the same scaling the resident dataset receives to raw transactions
+and decodes bulk scoring payloads (JSON, .npy, Arrow IPC) into feature matrices.
+"""
+
+import io
+import json
+import numpy as np
+import pandas as pd
+
+# Feature names for the credit card dataset, in model input order
+FEATURE_NAMES = ["Time"] + [f"V{i}" for i in range(1, 29)] + ["Amount"]
+
+# V1-V28 are already PCA-transformed; only these columns need standardizing
+SCALED_COLUMNS = ("Time", "Amount")
+
+NPY_CONTENT_TYPES = ("application/x-npy", "application/octet-stream")
+ARROW_CONTENT_TYPES = ("application/vnd.apache.arrow.stream",)
+
+
+class FeatureScaler:
+    """Standardizes Time and Amount column-wise, leaving V1-V28 untouched."""
+
+    def __init__(self):
+        self.mean = np.zeros(len(FEATURE_NAMES))
+        self.scale = np.ones(len(FEATURE_NAMES))
+
+    def fit(self, df: pd.DataFrame) -> "FeatureScaler":
+        """Fit each scaled column independently on the raw dataset."""
+        for col in SCALED_COLUMNS:
+            values = df[col].to_numpy(dtype=np.float64)
+            idx = FEATURE_NAMES.index(col)
+            std = values.std()
+            self.mean[idx] = values.mean()
+            self.scale[idx] = std if std > 0 else 1.0
+        return self
+
+    def state(self) -> dict:
+        """JSON-serializable fitted parameters."""
+        return {"mean": self.mean.tolist(), "scale": self.scale.tolist()}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "FeatureScaler":
+        """Rebuild a fitted scaler from state()."""
+        scaler = cls()
+        scaler.mean = np.asarray(state["mean"], dtype=np.float64)
+        scaler.scale = np.asarray(state["scale"], dtype=np.float64)
+        return scaler
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        """
+        Scale raw feature rows.
+
+        Args:
+            X: numpy array of shape (n_rows, n_features) in FEATURE_NAMES order
+
+        Returns:
+            new float64 array with Time and Amount standardized
+        """
+        return (np.asarray(X, dtype=np.float64) - self.mean) / self.scale
+
+
+def parse_batch_body(body: bytes, content_type: str) -> np.ndarray:
+    """
+    Decode a bulk scoring payload into a raw (n_rows, n_features) float64 matrix.
+
+    Accepted formats:
+        application/json   — {"rows": [[Time, V1..V28, Amount], ...]}
+                             or {"columns": {"Time": [...], "V1": [...], ...}}
+        application/x-npy  — a single 2-D .npy array (no pickles)
+        Arrow IPC stream   — a record batch with one column per feature name
+
+    Raises:
+        ValueError: malformed payload or wrong shape
+        LookupError: unsupported content type (or pyarrow not installed)
+    """
+    media_type = content_type.split(";")[0].strip().lower()
+
+    if media_type in ("application/json", ""):
+        X = _parse_json(body)
+    elif media_type in NPY_CONTENT_TYPES:
+        try:
+            X = np.load(io.BytesIO(body), allow_pickle=False)
+        except (OSError, EOFError) as e:
+            raise ValueError(f"Invalid .npy payload: {e}") from e
+    elif media_type in ARROW_CONTENT_TYPES:
+        X = _parse_arrow(body)
+    else:
+        raise LookupError(f"Unsupported content type: {content_type}")
+
+    X = np.asarray(X, dtype=np.float64)
+    if X.ndim != 2 or X.shape[1] != len(FEATURE_NAMES):
+        raise ValueError(
+            f"Expected shape (n, {len(FEATURE_NAMES)}) with columns {FEATURE_NAMES[0]}..{FEATURE_NAMES[-1]}, "
+            f"got {X.shape}"
+        )
+    if not np.isfinite(X).all():
+        raise ValueError("Features must be finite numbers")
+    return X
+
+
+def _parse_json(body: bytes) -> np.ndarray:
+    payload = json.loads(body)
+    if not isinstance(payload, dict):
+        raise ValueError('JSON body must be an object with "rows" or "columns"')
+    try:
+        if "rows" in payload:
+            if not isinstance(payload["rows"], list):
+                raise ValueError('"rows" must be a list of rows')
+            return np.asarray(payload["rows"], dtype=np.float64)
+        if "columns" in payload:
+            columns = payload["columns"]
+            if not isinstance(columns, dict):
+                raise ValueError('"columns" must map feature names to lists')
+            missing = [name for name in FEATURE_NAMES if name not in columns]
+            if missing:
+                raise ValueError(f"Missing columns: {missing}")
+            arrays = [np.asarray(columns[name], dtype=np.float64) for name in FEATURE_NAMES]
+            if any(a.ndim != 1 for a in arrays) or len({len(a) for a in arrays}) != 1:
+                raise ValueError("Every column must be a flat list of the same length")
+            return np.column_stack(arrays)
+    except TypeError as e:
+        # Objects or nulls where numbers belong
+        raise ValueError(f"Features must be numbers: {e}") from e
+    raise ValueError('JSON body must contain "rows" or "columns"')
+
+
+def _parse_arrow(body: bytes) -> np.ndarray:
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise LookupError("Arrow payloads require pyarrow to be installed") from e
+
+    table = pa.ipc.open_stream(body).read_all()
+    missing = [name for name in FEATURE_NAMES if name not in table.column_names]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+    return np.column_stack([table.column(name).to_numpy() for name in FEATURE_NAMES])
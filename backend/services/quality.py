@@ -0,0 +1,113 @@
+"""
+Live Detector Quality.
+Running confusion matrices and precision / recall / F1 / PR-AUC for the
+Isolation Forest, the autoencoder and the combined score. The streamer
+scores each transaction and already knows its ground-truth label, so
+these are the live counterpart of the classification reports in
+models/train.py.
+
+Each model keeps four confusion counters plus two fixed-bin histograms of
+its score, one for fraud rows and one for legitimate rows. Updates are
+O(1) per transaction, applied as a single bincount per batch. PR-AUC
+(average precision) comes from sweeping the histogram bins from the top
+score down. Rows that share a bin are treated as tied, so the result is
+accurate to QUALITY_BINS resolution.
+
+Scores are mapped to [0, 1] before binning:
+  isolation_forest  if_score, flagged when if_label == "fraud"
+  autoencoder       err / (err + threshold), so the decision threshold
+                    sits at 0.5 and large errors don't saturate; flagged
+                    when ae_label == "fraud"
+  combined          combined_confidence, flagged at HIGH / CRITICAL risk
+"""
+
+import os
+import numpy as np
+
+QUALITY_BINS = int(os.getenv("QUALITY_BINS") or 200)
+
+MODELS = ("isolation_forest", "autoencoder", "combined")
+
+
+class ModelQuality:
+    """Confusion counters and class-conditional score histograms for one detector."""
+
+    def __init__(self, bins: int = QUALITY_BINS):
+        self.bins = bins
+        # Rows: actual legitimate / fraud; columns: score bin
+        self.histogram = np.zeros((2, bins), dtype=np.int64)
+        self.tp = self.fp = self.tn = self.fn = 0
+
+    def add_batch(self, scores: np.ndarray, flagged: np.ndarray, actual: np.ndarray):
+        actual = actual.astype(bool)
+        self.tp += int(np.count_nonzero(flagged & actual))
+        self.fp += int(np.count_nonzero(flagged & ~actual))
+        self.fn += int(np.count_nonzero(~flagged & actual))
+        self.tn += int(np.count_nonzero(~flagged & ~actual))
+        score_bin = np.clip((scores * self.bins).astype(np.int64), 0, self.bins - 1)
+        self.histogram += np.bincount(
+            actual.astype(np.int64) * self.bins + score_bin, minlength=2 * self.bins,
+        ).reshape(2, self.bins)
+
+    def pr_auc(self) -> float | None:
+        """Average precision over thresholds at every bin edge, highest first."""
+        positives = self.histogram[1].sum()
+        if positives == 0:
+            return None
+        tp = np.cumsum(self.histogram[1][::-1])
+        fp = np.cumsum(self.histogram[0][::-1])
+        seen = tp + fp
+        precision = np.divide(tp, seen, out=np.ones(self.bins), where=seen > 0)
+        recall_gain = np.diff(tp, prepend=0) / positives
+        return round(float((recall_gain * precision).sum()), 4)
+
+    def summary(self) -> dict:
+        tp, fp, tn, fn = self.tp, self.fp, self.tn, self.fn
+        total = tp + fp + tn + fn
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        return {
+            "confusion_matrix": {"tp": tp, "fp": fp, "tn": tn, "fn": fn},
+            "precision": round(precision, 4),
+            "recall": round(recall, 4),
+            "f1": round(f1, 4),
+            "accuracy": round((tp + tn) / total, 4) if total else 0.0,
+            "pr_auc": self.pr_auc(),
+        }
+
+
+class QualityTracker:
+    """Per-model quality for the live feed, fed one batch of precomputed predictions at a time."""
+
+    def __init__(self, ae_threshold: float, bins: int = QUALITY_BINS):
+        self.ae_threshold = ae_threshold
+        self.models = {name: ModelQuality(bins) for name in MODELS}
+        self.total = 0
+        self.fraud = 0
+
+    def add_batch(self, predictions: dict[str, np.ndarray], actual: np.ndarray):
+        """Record decoded predict_batch() columns for rows whose true labels are `actual`."""
+        actual = np.asarray(actual)
+        self.total += len(actual)
+        self.fraud += int(np.count_nonzero(actual))
+
+        ae_error = np.asarray(predictions["ae_reconstruction_error"], dtype=np.float64)
+        risk_level = predictions["risk_level"]
+        self.models["isolation_forest"].add_batch(
+            np.asarray(predictions["if_score"], dtype=np.float64), predictions["if_label"] == "fraud", actual,
+        )
+        self.models["autoencoder"].add_batch(
+            ae_error / (ae_error + self.ae_threshold), predictions["ae_label"] == "fraud", actual,
+        )
+        self.models["combined"].add_batch(
+            np.asarray(predictions["combined_confidence"], dtype=np.float64),
+            (risk_level == "HIGH") | (risk_level == "CRITICAL"), actual,
+        )
+
+    def summary(self) -> dict:
+        return {
+            "total_transactions": self.total,
+            "fraud_transactions": self.fraud,
+            "models": {name: quality.summary() for name, quality in self.models.items()},
+        }
@@ -0,0 +1,172 @@
+"""
+Replay Engine.
+Paces the live feed. Three modes (REPLAY_MODE):
+
+  demo      (default) one transaction every 0.5–2 s — the dashboard demo feel
+  rate      REPLAY_TPS transactions per second, shaped by REPLAY_PROFILE
+  timewarp  rows in the dataset's own Time order, REPLAY_WARP dataset seconds
+            per wall second (the data's natural lulls and peaks included)
+
+In rate and timewarp modes the engine wakes every REPLAY_TICK_MS, works out
+how many rows fell due since the last tick and emits them as one batch, so
+lookups and attributions stay vectorized at thousands of TPS (attributions
+run on the model executor, off the event loop). Sleeps are scheduled
+against tick deadlines, so batch work does not slow the rate.
+
+Burst profiles (REPLAY_PROFILE) multiply the rate (or warp) over time:
+  steady                          constant
+  burst:<period>:<factor>:<len>   factor x for the first <len> s of every <period> s
+  ramp:<seconds>                  linear from 0 to full rate, then constant
+  sine:<period>:<amplitude>       1 + amplitude * sin(2π t / period)
+
+stats() reports target vs achieved TPS over the last REPLAY_WINDOW seconds.
+"""
+
+import os
+import math
+import time
+import random
+import asyncio
+from collections import deque
+from typing import Callable
+import numpy as np
+
+REPLAY_MODE = os.getenv("REPLAY_MODE") or "demo"
+REPLAY_TPS = float(os.getenv("REPLAY_TPS") or 1000)
+REPLAY_WARP = float(os.getenv("REPLAY_WARP") or 60)
+REPLAY_PROFILE = os.getenv("REPLAY_PROFILE") or "steady"
+REPLAY_TICK_MS = float(os.getenv("REPLAY_TICK_MS") or 50)
+# Most rows emitted in one tick; a producer that falls further behind sheds rate instead of spiralling
+REPLAY_MAX_BATCH = int(os.getenv("REPLAY_MAX_BATCH") or 5000)
+# Seconds of history behind the achieved/target rates
+REPLAY_WINDOW = float(os.getenv("REPLAY_WINDOW") or 5)
+
+MODES = ("demo", "rate", "timewarp")
+
+
+def parse_profile(spec: str) -> Callable[[float], float]:
+    """Rate multiplier as a function of seconds since the replay started."""
+    name, *params = spec.split(":")
+    try:
+        values = [float(p) for p in params]
+        if name == "steady" and not values:
+            return lambda t: 1.0
+        if name == "burst":
+            period, factor, length = values
+            return lambda t: factor if t % period < length else 1.0
+        if name == "ramp":
+            (seconds,) = values
+            return lambda t: min(1.0, t / seconds)
+        if name == "sine":
+            period, amplitude = values
+            return lambda t: max(0.0, 1.0 + amplitude * math.sin(2 * math.pi * t / period))
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid REPLAY_PROFILE: {spec!r}")
+
+
+class ReplayEngine:
+    """Turns wall-clock ticks into batches of due transactions."""
+
+    def __init__(
+        self,
+        mode: str = REPLAY_MODE,
+        tps: float = REPLAY_TPS,
+        warp: float = REPLAY_WARP,
+        profile: str = REPLAY_PROFILE,
+        tick_ms: float = REPLAY_TICK_MS,
+        max_batch: int = REPLAY_MAX_BATCH,
+        window: float = REPLAY_WINDOW,
+        time_scale: float = 1.0,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown REPLAY_MODE: {mode}")
+        self.mode = mode
+        self.tps = tps
+        self.warp = warp
+        self.profile_spec = profile
+        self.profile = parse_profile(profile)
+        self.tick = tick_ms / 1000
+        self.max_batch = max_batch
+        self.window = window
+        # Dataset seconds per unit of the scaled Time column
+        self.time_scale = time_scale
+
+        self.emitted = 0
+        self.ticks = 0
+        self.capped_ticks = 0
+        # (wall time, rows due, rows emitted) per tick
+        self._history: deque[tuple[float, int, int]] = deque()
+
+    @property
+    def time_ordered(self) -> bool:
+        return self.mode == "timewarp"
+
+    def _record(self, now: float, due: int, emitted: int):
+        self.ticks += 1
+        self.emitted += emitted
+        self._history.append((now, due, emitted))
+        while self._history and self._history[0][0] < now - self.window:
+            self._history.popleft()
+
+    async def batches(self, streamer):
+        """Yield lists of scored transactions from `streamer` at the configured pace."""
+        if self.mode == "demo":
+            while True:
+                yield await streamer.next_batch(1)
+                self._record(time.monotonic(), 1, 1)
+                # Random delay between 0.5s and 2s for realistic feel
+                await asyncio.sleep(random.uniform(0.5, 2.0))
+
+        # Dataset seconds of each row, in emission order
+        times = np.asarray(streamer.dataset.times, dtype=np.float64)[streamer.order] * self.time_scale
+        start = last = time.monotonic()
+        credit = 0.0
+        virtual = None
+        deadline = start
+        while True:
+            deadline += self.tick
+            await asyncio.sleep(max(0.0, deadline - time.monotonic()))
+            now = time.monotonic()
+            speed = self.profile(now - start)
+            dt, last = now - last, now
+
+            if self.mode == "rate":
+                credit += dt * self.tps * speed
+                due = int(credit)
+                credit -= due
+            else:
+                position = streamer.current_index
+                if position >= len(times) or virtual is None:
+                    position = 0 if position >= len(times) else position
+                    virtual = times[position]  # new cycle: restart the virtual clock at its first row
+                virtual += dt * self.warp * speed
+                due = int(np.searchsorted(times, virtual, side="right")) - position
+
+            emitted = min(due, self.max_batch)
+            if emitted < due:
+                self.capped_ticks += 1
+                if self.mode == "timewarp":
+                    virtual = times[position + emitted - 1]  # hold the clock where emission stopped
+            if emitted > 0:
+                yield await streamer.next_batch(emitted)
+            self._record(now, due, emitted)
+            if now > deadline + self.tick:
+                deadline = now  # overran by more than a tick: don't burst to catch up on sleep
+
+    def stats(self) -> dict:
+        span = self.window
+        if self._history:
+            span = max(min(self.window, time.monotonic() - self._history[0][0]), 1e-9)
+        due = sum(h[1] for h in self._history)
+        emitted = sum(h[2] for h in self._history)
+        return {
+            "mode": self.mode,
+            "profile": self.profile_spec,
+            "target_tps": round(due / span, 1),
+            "achieved_tps": round(emitted / span, 1),
+            "emitted": self.emitted,
+            "ticks": self.ticks,
+            "capped_ticks": self.capped_ticks,
+            "avg_batch": round(self.emitted / self.ticks, 2) if self.ticks else 0.0,
+        }
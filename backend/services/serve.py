@@ -0,0 +1,79 @@
+"""
+Multi-worker launcher.
+Prepares everything the workers can share once, in this parent process:
+the memory-mapped dataset cache, the precomputed predictions, the
+flattened forest arrays and the drift reference. It then starts uvicorn with N worker processes.
+Workers memory-map those files instead of building their own copies, so
+the large arrays live once in the page cache however many workers run.
+The live stream is produced by one elected worker and mirrored to the
+rest through services.shared_feed.
+
+Usage (from backend/):
+    python -m services.serve --workers 4 --port 8000
+    python -m services.serve --prepare-only   # e.g. at image build time
+"""
+
+import os
+import argparse
+
+# Heavy imports stay inside functions: spawned workers re-import this module
+# before they can answer the supervisor's health check
+
+# Set for the worker processes; >1 switches main.py to the shared feed
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS") or 1)
+
+FEED_NAME = "stream.feed"
+LOCK_NAME = "stream.lock"
+DRIFT_INBOX_NAME = "drift.counts"
+
+
+def prepare(cache_dir=None):
+    """Build every shared, read-only artifact so workers only attach."""
+    from services.dataset import CACHE_DIR, TransactionDataset, build_cache, cache_is_current, find_source
+    from services.predictor import FraudPredictor
+    from services.drift import ensure_reference
+
+    cache_dir = cache_dir or CACHE_DIR
+    source = find_source()
+    if source is None:
+        raise FileNotFoundError("No dataset found in data/")
+    if not cache_is_current(source, cache_dir):
+        print(f"[*] Converting {source} → {cache_dir}")
+        build_cache(source, cache_dir)
+
+    dataset, _ = TransactionDataset.open(cache_dir)
+    # Writes the flattened forest next to the dataset on first run
+    predictor = FraudPredictor(cache_dir=cache_dir)
+    if not dataset.load_predictions(cache_dir, predictor.fingerprint):
+        dataset.predictions = predictor.predict_all(dataset.features)
+        dataset.save_predictions(cache_dir, predictor.fingerprint)
+        print(f"[*] Precomputed predictions for {len(dataset)} rows")
+    ensure_reference(dataset, cache_dir, predictor.fingerprint)
+
+    # A feed left by an earlier run would carry stale ids and stats (and undrained drift counts)
+    (cache_dir / FEED_NAME).unlink(missing_ok=True)
+    (cache_dir / DRIFT_INBOX_NAME).unlink(missing_ok=True)
+    return cache_dir
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT") or 8000))
+    parser.add_argument("--prepare-only", action="store_true", help="build the shared artifacts and exit")
+    args = parser.parse_args()
+
+    cache_dir = prepare()
+    if args.prepare_only:
+        print(f"[✓] Shared artifacts ready in {cache_dir}")
+        return
+    os.environ["SERVE_WORKERS"] = str(args.workers)
+    print(f"[✓] Shared artifacts ready in {cache_dir} — starting {args.workers} workers")
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
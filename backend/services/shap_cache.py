@@ -0,0 +1,143 @@
+"""
+SHAP Cache Service.
+Bounded LRU cache of SHAP explanations keyed by dataset row id, with
+hit/miss/eviction counters, plus an optional background job that
+precomputes SHAP in batches for every transaction the live feed flags
+HIGH or CRITICAL — the ones analysts are about to click.
+"""
+
+import os
+import asyncio
+from collections import OrderedDict
+from typing import Hashable, Optional
+from services.hub import Subscription
+
+SHAP_CACHE_SIZE = int(os.getenv("SHAP_CACHE_SIZE") or 4096)
+SHAP_PRECOMPUTE = os.getenv("SHAP_PRECOMPUTE", "0").lower() in ("1", "true", "yes")
+
+FLAGGED_LEVELS = ("HIGH", "CRITICAL")
+
+
+class LRUCache:
+    """Bounded LRU mapping with hit/miss/eviction counters."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[Hashable, object] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[object]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, value: object):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class ShapCache(LRUCache):
+    """LRU cache of explain() results keyed by dataset row id."""
+
+    def __init__(self, max_size: int = SHAP_CACHE_SIZE):
+        super().__init__(max_size)
+
+
+class ShapPrecomputer:
+    """Taps the live feed and fills the cache for flagged transactions."""
+
+    def __init__(self, hub, dataset, executor, cache: ShapCache, batch_size: int = 32, max_wait: float = 2.0):
+        self.hub = hub
+        self.dataset = dataset
+        self.executor = executor
+        self.cache = cache
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.precomputed = 0
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        # A hub tap rather than a subscription: not a client, and only flagged rows are queued
+        flagged = Subscription(self.hub.queue_size)
+
+        def tap(tx: dict):
+            if tx["risk_level"] in FLAGGED_LEVELS:
+                flagged.push(tx)
+
+        self.hub.add_tap(tap)
+        loop = asyncio.get_running_loop()
+        # Kept across batches and awaited with asyncio.wait: wait_for before Python 3.12 can
+        # swallow the cancellation stop() sends, leaving shutdown waiting on this task forever
+        getter: asyncio.Task | None = None
+        try:
+            while True:
+                pending: list[int] = []
+                deadline = loop.time() + self.max_wait
+                while len(pending) < self.batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    if getter is None:
+                        getter = asyncio.ensure_future(flagged.get())
+                    done, _ = await asyncio.wait({getter}, timeout=timeout)
+                    if not done:
+                        break
+                    tx = getter.result()
+                    getter = None
+                    idx = tx["df_idx"]
+                    if idx not in self.cache and idx not in pending:
+                        pending.append(idx)
+
+                if not pending:
+                    continue
+                try:
+                    results = await self.executor.run("explain_batch", self.dataset.features[pending])
+                except Exception as e:
+                    print(f"[!] SHAP precompute failed: {e}")
+                    continue
+                for idx, result in zip(pending, results):
+                    self.cache.put(idx, result)
+                self.precomputed += len(pending)
+        finally:
+            if getter is not None:
+                getter.cancel()
+            self.hub.remove_tap(tap)
@@ -0,0 +1,332 @@
+"""
+Shared Feed Service.
+Coordinates the live transaction stream across worker processes.
+
+One worker holds an exclusive flock on the feed's lock file and runs the
+producer (the leader); it writes every transaction into a memory-mapped
+ring of fixed-size slots, plus its streamer state (live stats, position
+in the demo cycle) into a header block. The other workers tail the ring
+and republish into their local StreamHub, and serve /api/poll and
+/api/stats from the same shared memory — so every worker returns the
+same ids and the same stats. If the leader dies its lock is released and
+the next follower to retry takes over where the feed left off.
+The leader also publishes its drift report; every worker's drift bin
+counts reach it through a SharedCounts file that only the leader drains.
+
+File layout (little-endian):
+  header   magic u32 | version u32 | n_slots u32 | slot_size u32 | next_id u64 |
+           state_seq u64 | state_len u32 | pad u32 | state bytes (STATE_SIZE)
+  slot i   id u64 | len u32 | pad u32 | JSON bytes (slot_size - 16)
+A slot's id is zeroed while it is rewritten and set last, so readers can
+detect torn reads; the state block uses a sequence counter the same way.
+"""
+
+import os
+import json
+import mmap
+import fcntl
+import struct
+import asyncio
+import numpy as np
+from pathlib import Path
+from services.streamer import page_since
+
+FEED_SLOT_SIZE = int(os.getenv("FEED_SLOT_SIZE") or 2048)
+FEED_POLL_INTERVAL = float(os.getenv("FEED_POLL_INTERVAL") or 0.05)
+# How often a follower retries the leader lock
+FEED_LEADER_RETRY = float(os.getenv("FEED_LEADER_RETRY") or 2.0)
+
+MAGIC = 0x46504644  # "FPFD"
+VERSION = 1
+HEADER = struct.Struct("<IIIIQQII")
+STATE_SIZE = 8192
+DATA_OFFSET = HEADER.size + STATE_SIZE
+SLOT_HEADER = struct.Struct("<QII")
+NEXT_ID_OFFSET = 16
+STATE_SEQ_OFFSET = 24
+U64 = struct.Struct("<Q")
+
+
+class SharedFeed:
+    """Memory-mapped ring of JSON transactions shared between processes."""
+
+    def __init__(self, path: Path, n_slots: int, slot_size: int = FEED_SLOT_SIZE):
+        self.path = Path(path)
+        self.n_slots = n_slots
+        self.slot_size = slot_size
+        size = DATA_OFFSET + n_slots * slot_size
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            # First opener sizes and stamps the file; later ones must agree on the layout
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.fstat(fd).st_size != size:
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+                os.pwrite(fd, HEADER.pack(MAGIC, VERSION, n_slots, slot_size, 1, 0, 0, 0), 0)
+            self._mm = mmap.mmap(fd, size)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+        self._state_oversized = False
+
+        magic, version, slots, slot_bytes = HEADER.unpack_from(self._mm, 0)[:4]
+        if (magic, version, slots, slot_bytes) != (MAGIC, VERSION, n_slots, slot_size):
+            raise ValueError(f"Incompatible shared feed at {self.path}")
+
+    # ── Ring ──
+
+    @property
+    def next_id(self) -> int:
+        return U64.unpack_from(self._mm, NEXT_ID_OFFSET)[0]
+
+    @property
+    def first_id(self) -> int:
+        return max(1, self.next_id - self.n_slots)
+
+    def append(self, tx: dict):
+        """Write the transaction with id == next_id, then publish it by bumping next_id."""
+        tx_id = tx["id"]
+        payload = json.dumps(tx, separators=(",", ":")).encode()
+        if len(payload) > self.slot_size - SLOT_HEADER.size:
+            # Oversized extras (e.g. long explanations) are dropped rather than the transaction
+            payload = json.dumps({k: v for k, v in tx.items() if k != "top_features"}, separators=(",", ":")).encode()
+        offset = DATA_OFFSET + (tx_id % self.n_slots) * self.slot_size
+        U64.pack_into(self._mm, offset, 0)
+        self._mm[offset + SLOT_HEADER.size: offset + SLOT_HEADER.size + len(payload)] = payload
+        struct.pack_into("<I", self._mm, offset + 8, len(payload))
+        U64.pack_into(self._mm, offset, tx_id)
+        U64.pack_into(self._mm, NEXT_ID_OFFSET, tx_id + 1)
+
+    def _read(self, tx_id: int) -> dict | None:
+        offset = DATA_OFFSET + (tx_id % self.n_slots) * self.slot_size
+        slot_id, length, _ = SLOT_HEADER.unpack_from(self._mm, offset)
+        if slot_id != tx_id:
+            return None
+        payload = self._mm[offset + SLOT_HEADER.size: offset + SLOT_HEADER.size + length]
+        if U64.unpack_from(self._mm, offset)[0] != tx_id:
+            return None  # overwritten while copying
+        return json.loads(payload)
+
+    def since(self, since_id: int, limit: int, tail: bool = False) -> dict:
+        """Page of up to `limit` transactions after since_id (see streamer.page_since)."""
+        next_id = self.next_id
+        return page_since(since_id, limit, max(1, next_id - self.n_slots), next_id, self._read, tail)
+
+    # ── Leader state ──
+
+    def write_state(self, state: dict) -> bool:
+        """Publish the leader's state; an oversized state is skipped (followers keep the last one)."""
+        payload = json.dumps(state, separators=(",", ":")).encode()
+        if len(payload) > STATE_SIZE:
+            if not self._state_oversized:
+                print(f"[!] Shared feed state is {len(payload)} bytes (> {STATE_SIZE}) — not published")
+            self._state_oversized = True
+            return False
+        self._state_oversized = False
+        seq = U64.unpack_from(self._mm, STATE_SEQ_OFFSET)[0]
+        U64.pack_into(self._mm, STATE_SEQ_OFFSET, seq + 1)  # odd: write in progress
+        struct.pack_into("<I", self._mm, STATE_SEQ_OFFSET + 8, len(payload))
+        self._mm[HEADER.size: HEADER.size + len(payload)] = payload
+        U64.pack_into(self._mm, STATE_SEQ_OFFSET, seq + 2)
+        return True
+
+    def read_state(self) -> dict | None:
+        for _ in range(10):
+            seq = U64.unpack_from(self._mm, STATE_SEQ_OFFSET)[0]
+            if seq % 2:
+                continue
+            length = struct.unpack_from("<I", self._mm, STATE_SEQ_OFFSET + 8)[0]
+            payload = self._mm[HEADER.size: HEADER.size + min(length, STATE_SIZE)]
+            if U64.unpack_from(self._mm, STATE_SEQ_OFFSET)[0] != seq:
+                continue
+            if not length or length > STATE_SIZE:
+                return None
+            try:
+                state = json.loads(payload)
+            except ValueError:
+                return None  # corrupt block (e.g. a leader that died mid-layout change)
+            return state if isinstance(state, dict) else None
+        return None
+
+    def close(self):
+        self._mm.close()
+
+
+class LeaderLock:
+    """Non-blocking exclusive flock held for the life of the leader process."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._fd: int | None = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+class SharedCounts:
+    """Int64 counters in a shared file: any process adds, one drains (flock-serialized)."""
+
+    def __init__(self, path: Path, size: int):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        nbytes = size * 8
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size != nbytes:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, nbytes)
+            self._mm = mmap.mmap(self._fd, nbytes)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self.values = np.ndarray(size, dtype=np.int64, buffer=self._mm)
+
+    def add(self, counts: np.ndarray):
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            self.values += counts
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def drain(self) -> np.ndarray:
+        """Everything added since the last drain, resetting the counters."""
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            counts = self.values.copy()
+            self.values[:] = 0
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return counts
+
+    def close(self):
+        del self.values
+        self._mm.close()
+        os.close(self._fd)
+
+
+class SharedStream:
+    """
+    Drop-in for the streamer's read side (get_buffered / get_live_stats /
+    get_model_quality / get_drift_report) that runs the producer in exactly
+    one process and mirrors it elsewhere.
+    """
+
+    def __init__(self, hub, feed: SharedFeed, lock: LeaderLock):
+        self.hub = hub
+        self.streamer = hub.streamer
+        self.feed = feed
+        self.lock = lock
+        self._cursor: int | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self.lock.held
+
+    def get_buffered(self, since_id: int = 0, limit: int = 20, tail: bool = False) -> dict:
+        return self.feed.since(since_id, limit, tail)
+
+    def get_live_stats(self) -> dict:
+        if self.is_leader:
+            return self.streamer.get_live_stats()
+        state = self.feed.read_state()
+        return state["stats"] if state else self.streamer.get_live_stats()
+
+    def get_model_quality(self) -> dict:
+        if self.is_leader:
+            return self.streamer.get_model_quality()
+        state = self.feed.read_state()
+        return state["quality"] if state else self.streamer.get_model_quality()
+
+    def get_drift_report(self) -> dict | None:
+        if self.is_leader:
+            return self.streamer.get_drift_report()
+        state = self.feed.read_state()
+        return state.get("drift") if state else None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.lock.release()
+
+    async def _run(self):
+        while True:
+            if self.lock.try_acquire():
+                await self._lead()
+            else:
+                await self._follow()
+
+    async def _lead(self):
+        # Continue the shared id sequence and demo cycle where the previous leader stopped
+        state = self.feed.read_state()
+        if state:
+            self.streamer.restore_state(state["streamer"])
+            if self.streamer.drift is not None and state.get("drift"):
+                # Keep serving the last report until this worker's first evaluation
+                self.streamer.drift.report = state["drift"]
+        self.streamer.buffer.next_id = max(self.streamer.buffer.next_id, self.feed.next_id)
+        print(f"[*] Stream leader (pid {os.getpid()}) from id {self.streamer.buffer.next_id}")
+
+        while True:
+            try:
+                async for batch in self.streamer.stream_batches():
+                    for tx in batch:
+                        self.feed.append(tx)
+                    # Once per batch: followers only need the latest stats
+                    self.feed.write_state({
+                        "stats": self.streamer.get_live_stats(),
+                        "quality": self.streamer.get_model_quality(),
+                        "drift": self.streamer.get_drift_report(),
+                        "streamer": self.streamer.state(),
+                    })
+                    for tx in batch:
+                        self.hub.publish(tx)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[!] Stream producer error: {e}")
+                await asyncio.sleep(1.0)
+
+    async def _follow(self):
+        """Tail the ring until it's time to retry the leader lock."""
+        loop = asyncio.get_running_loop()
+        retry_at = loop.time() + FEED_LEADER_RETRY
+        if self._cursor is None:
+            self._cursor = self.feed.next_id - 1  # live feed only, no backlog
+        while loop.time() < retry_at:
+            page = self.feed.since(self._cursor, self.feed.n_slots)
+            for tx in page["transactions"]:
+                self.hub.publish(tx)
+            self._cursor = page["next_since_id"]
+            await asyncio.sleep(FEED_POLL_INTERVAL)
@@ -3,26 +3,112 @@ Transaction Streamer Service.
 Simulates real-time transaction feed by cycling through the dataset.
 Supports WebSocket and HTTP polling.
 Tracks live stats as transactions are processed.
-Resets all counters when the full cycle completes.
+With STREAM_TOP_FEATURES > 0, each transaction carries its top drivers
+(approximate attributions), computed on the model executor so the event
+loop never runs them — at high replay rates they cost ~20x the rest of
+the batch, hence opt-in.
+Pacing comes from a ReplayEngine (services.replay): the demo trickle by
+default, or batches per tick at a target rate for load testing.
+Resets all counters when the full cycle completes; rolling 1m/5m/1h
+windows (services.live_stats) and per-model quality (services.quality)
+carry on across cycles.
 """
 
-import asyncio
-import random
+import os
 import numpy as np
-import pandas as pd
 from typing import Optional
+from services.dataset import TransactionDataset
+from services.metrics import TRANSACTIONS_STREAMED
+from services.replay import ReplayEngine
+from services.live_stats import LiveWindows
+from services.quality import QualityTracker
+
+# Transactions kept for polling clients to catch up from
+STREAM_BUFFER_SIZE = int(os.getenv("STREAM_BUFFER_SIZE") or 10000)
+# Top drivers attached to each live transaction (0 disables)
+STREAM_TOP_FEATURES = int(os.getenv("STREAM_TOP_FEATURES") or 0)
+
+
+def page_since(since_id: int, limit: int, first_id: int, next_id: int, read, tail: bool = False) -> dict:
+    """
+    One page of a ring of transactions for a polling cursor.
+
+    Returns up to `limit` transactions with id > since_id, oldest first, so a
+    client that follows next_since_id sees every buffered row exactly once.
+    gap counts ids it can no longer get (evicted, or skipped with tail=True,
+    which starts at the newest `limit` rows). A cursor at or past next_id
+    predates a restart: it is reset to the tail and flagged with reset.
+    """
+    reset = since_id >= next_id
+    if reset:
+        since_id, tail = 0, True
+    start = max(since_id + 1, first_id)
+    if tail:
+        start = max(start, next_id - limit)
+    end = min(start + limit, next_id)
+    txs = (read(i) for i in range(start, end))
+    return {
+        "transactions": [tx for tx in txs if tx is not None],
+        "next_since_id": max(end - 1, since_id),
+        "gap": start - since_id - 1,
+        "has_more": end < next_id,
+        "reset": reset,
+    }
+
+
+class TransactionBuffer:
+    """
+    Fixed-capacity ring buffer of transactions with monotonically increasing ids.
+    An id maps straight to its slot (id % capacity), so since_id lookups are arithmetic.
+    """
+
+    def __init__(self, capacity: int = STREAM_BUFFER_SIZE):
+        self.capacity = capacity
+        self._slots: list[Optional[dict]] = [None] * capacity
+        self.next_id = 1  # ids start at 1 so since_id=0 means "from the beginning"
+
+    def __len__(self) -> int:
+        return self.next_id - self.first_id
+
+    @property
+    def first_id(self) -> int:
+        """Oldest id still held in the buffer."""
+        return max(1, self.next_id - self.capacity)
+
+    def append(self, tx: dict):
+        """Store a transaction whose id was taken from next_id."""
+        self._slots[self.next_id % self.capacity] = tx
+        self.next_id += 1
+
+    def since(self, since_id: int, limit: int, tail: bool = False) -> dict:
+        """Page of up to `limit` transactions after since_id (see page_since)."""
+        return page_since(since_id, limit, self.first_id, self.next_id, lambda i: self._slots[i % self.capacity], tail)
 
 
 class TransactionStreamer:
     """Streams transactions from the dataset with simulated timing."""
 
-    def __init__(self, df: pd.DataFrame, predictor):
-        self.df = df
+    def __init__(
+        self,
+        dataset: TransactionDataset,
+        predictor,
+        buffer_size: int = STREAM_BUFFER_SIZE,
+        explainer=None,
+        top_features: int = STREAM_TOP_FEATURES,
+        replay: ReplayEngine | None = None,
+        drift=None,
+        executor=None,
+    ):
+        self.dataset = dataset
         self.predictor = predictor
-        self.feature_cols = [c for c in df.columns if c not in ("Class", "Amount_Original")]
+        self.explainer = explainer
+        self.top_features = top_features
+        self.replay = replay or ReplayEngine()
+        self.drift = drift
+        # ModelExecutor for the attributions; without one they run inline (scripts, benchmarks)
+        self.executor = executor
         self.current_index = 0
-        self.buffer: list[dict] = []
-        self.max_buffer = 100
+        self.buffer = TransactionBuffer(buffer_size)
         self._running = False
 
         # ── Live stats accumulators ──
@@ -32,10 +118,12 @@ class TransactionStreamer:
         self.correct_predictions = 0
         self._risk_score_sum = 0.0
         self.risk_counts = {"CRITICAL": 0, "HIGH": 0, "MEDIUM": 0, "LOW": 0}
+        self.windows = LiveWindows()
+        self.quality = QualityTracker(predictor.ae_threshold)
 
         # Build demo pool: ALL rows with fraud boosted ×3 for visibility
-        fraud_idx = df.index[df["Class"] == 1].tolist()
-        legit_idx = df.index[df["Class"] == 0].tolist()
+        fraud_idx = np.flatnonzero(dataset.labels == 1).tolist()
+        legit_idx = np.flatnonzero(dataset.labels == 0).tolist()
 
         # Use all legit + boosted fraud for ~12% visible fraud rate
         demo_indices = legit_idx + fraud_idx * 8
@@ -43,8 +131,14 @@ class TransactionStreamer:
         _rnd.seed(42)
         _rnd.shuffle(demo_indices)
         self.demo_indices = demo_indices
-        print(f"[*] Streamer initialized with {len(self.demo_indices)} transaction indices "
-              f"({len(fraud_idx)*8} fraud boosted)")
+        if self.replay.time_ordered:
+            # Time-warp replay walks every row once, in the dataset's own Time order
+            self.order = np.argsort(np.asarray(dataset.times), kind="stable")
+            print(f"[*] Streamer initialized with {len(self.order)} transactions in Time order")
+        else:
+            self.order = np.asarray(demo_indices, dtype=np.int64)
+            print(f"[*] Streamer initialized with {len(self.demo_indices)} transaction indices "
+                  f"({len(fraud_idx)*8} fraud boosted)")
 
     def _reset_stats(self):
         """Reset all live counters for a new cycle."""
@@ -54,66 +148,141 @@ class TransactionStreamer:
         self.correct_predictions = 0
         self._risk_score_sum = 0.0
         self.risk_counts = {"CRITICAL": 0, "HIGH": 0, "MEDIUM": 0, "LOW": 0}
-        self.buffer.clear()
         print("[*] Streamer cycle complete — stats reset to 0")
 
+    def state(self) -> dict:
+        """Cycle position and live counters, for handing the stream to another process."""
+        return {
+            "current_index": self.current_index,
+            "total_processed": self.total_processed,
+            "fraud_flagged": self.fraud_flagged,
+            "blocked_amount": self.blocked_amount,
+            "correct_predictions": self.correct_predictions,
+            "risk_score_sum": self._risk_score_sum,
+            "risk_counts": dict(self.risk_counts),
+        }
+
+    def restore_state(self, state: dict):
+        self.current_index = state["current_index"]
+        self.total_processed = state["total_processed"]
+        self.fraud_flagged = state["fraud_flagged"]
+        self.blocked_amount = state["blocked_amount"]
+        self.correct_predictions = state["correct_predictions"]
+        self._risk_score_sum = state["risk_score_sum"]
+        self.risk_counts = dict(state["risk_counts"])
+
     def get_next_transaction(self) -> dict:
         """Get the next transaction with prediction."""
+        return self.get_next_batch(1)[0]
+
+    def _next_indices(self, remaining: int) -> np.ndarray:
         # Reset everything when the full cycle completes
-        if self.current_index >= len(self.demo_indices):
+        if self.current_index >= len(self.order):
             self.current_index = 0
             self._reset_stats()
+        stop = min(len(self.order), self.current_index + remaining)
+        return self.order[self.current_index:stop]
 
-        df_idx = self.demo_indices[self.current_index]
-        row = self.df.iloc[df_idx]
-        features = row[self.feature_cols].values.astype(np.float64)
-        prediction = self.predictor.predict(features)
-
-        # Use original (unscaled) amount for display; fall back to scaled if missing
-        display_amount = float(row.get("Amount_Original", row.get("Amount", 0)))
-
-        tx = {
-            "id": int(self.current_index),
-            "df_idx": int(df_idx),
-            "time": float(row.get("Time", 0)),
-            "amount": display_amount,
-            "is_fraud": int(row["Class"]),
-            "risk_level": prediction["risk_level"],
-            "combined_confidence": prediction["combined_confidence"],
-            "recommendation": prediction["recommendation"],
-            "if_label": prediction["if_label"],
-            "ae_label": prediction["ae_label"],
-        }
+    @property
+    def _explaining(self) -> bool:
+        return self.explainer is not None and self.top_features > 0
+
+    def get_next_batch(self, n: int) -> list[dict]:
+        """Get the next n transactions, explaining inline (synchronous callers only)."""
+        txs = []
+        while len(txs) < n:
+            idx = self._next_indices(n - len(txs))
+            explanations = None
+            if self._explaining:
+                explanations = self.explainer.explain_batch(
+                    self.dataset.features[idx], top_k=self.top_features, approximate=True,
+                )
+            txs.extend(self._build(idx, explanations))
+        return txs
+
+    async def next_batch(self, n: int) -> list[dict]:
+        """Get the next n transactions; attributions run on the model executor."""
+        if self.executor is None:
+            return self.get_next_batch(n)
+        txs = []
+        while len(txs) < n:
+            idx = self._next_indices(n - len(txs))
+            explanations = None
+            if self._explaining:
+                explanations = await self.executor.run(
+                    "explain_batch", np.asarray(self.dataset.features[idx]), top_k=self.top_features, approximate=True,
+                )
+            txs.extend(self._build(idx, explanations))
+        return txs
 
-        self.current_index += 1
+    def _build(self, idx: np.ndarray, explanations: list[dict] | None = None) -> list[dict]:
+        # Predictions are precomputed on the resident dataset at startup
+        columns = self.dataset.predictions_take(idx)
+        labels = self.dataset.labels[idx]
+        # Use original (unscaled) amount for display
+        display_amounts = self.dataset.amounts[idx]
+        self.windows.add_batch(
+            columns["risk_level"], columns["recommendation"], columns["combined_confidence"], display_amounts, labels,
+        )
+        self.quality.add_batch(columns, labels)
+        features = self.dataset.features[idx]
+        if self.drift is not None:
+            self.drift.add_batch(features, columns["if_score"], columns["ae_reconstruction_error"])
+        predictions = {key: values.tolist() for key, values in columns.items()}
+        actual = labels.tolist()
+        amounts = display_amounts.tolist()
+        times = self.dataset.times[idx].astype(np.float64).tolist()
 
-        # ── Accumulate live stats ──
-        self.total_processed += 1
-        self._risk_score_sum += prediction["combined_confidence"]
+        txs = []
+        streamed = dict.fromkeys(self.risk_counts, 0)
+        for i, df_idx in enumerate(idx.tolist()):
+            rl = predictions["risk_level"][i]
+            confidence = predictions["combined_confidence"][i]
+            tx = {
+                "id": self.buffer.next_id,
+                "df_idx": df_idx,
+                "time": times[i],
+                "amount": amounts[i],
+                "is_fraud": actual[i],
+                "risk_level": rl,
+                "combined_confidence": confidence,
+                "recommendation": predictions["recommendation"][i],
+                "if_label": predictions["if_label"][i],
+                "ae_label": predictions["ae_label"][i],
+            }
+            if explanations is not None:
+                tx["top_features"] = explanations[i]["shap_values"]
+
+            self.current_index += 1
+
+            # ── Accumulate live stats ──
+            self.total_processed += 1
+            self._risk_score_sum += confidence
 
-        is_flagged = prediction["risk_level"] in ("HIGH", "CRITICAL")
-        if is_flagged:
-            self.fraud_flagged += 1
-        if prediction["recommendation"] == "BLOCK":
-            self.blocked_amount += abs(display_amount)
+            is_flagged = rl in ("HIGH", "CRITICAL")
+            if is_flagged:
+                self.fraud_flagged += 1
+            if tx["recommendation"] == "BLOCK":
+                self.blocked_amount += abs(tx["amount"])
 
-        # Track risk distribution
-        rl = prediction["risk_level"]
-        if rl in self.risk_counts:
-            self.risk_counts[rl] += 1
+            # Track risk distribution
+            if rl in self.risk_counts:
+                self.risk_counts[rl] += 1
+                streamed[rl] += 1
 
-        # Check prediction correctness
-        predicted_fraud = 1 if is_flagged else 0
-        actual = int(row["Class"])
-        if predicted_fraud == actual:
-            self.correct_predictions += 1
+            # Check prediction correctness
+            predicted_fraud = 1 if is_flagged else 0
+            if predicted_fraud == actual[i]:
+                self.correct_predictions += 1
 
-        # Add to buffer for polling clients
-        self.buffer.append(tx)
-        if len(self.buffer) > self.max_buffer:
-            self.buffer = self.buffer[-self.max_buffer:]
+            # Add to buffer for polling clients
+            self.buffer.append(tx)
+            txs.append(tx)
 
-        return tx
+        for rl, count in streamed.items():
+            if count:
+                TRANSACTIONS_STREAMED.inc(count, risk_level=rl)
+        return txs
 
     def get_live_stats(self) -> dict:
         """Return accumulated live stats from processed transactions."""
@@ -126,6 +295,7 @@ class TransactionStreamer:
                 "model_accuracy": 0.0,
                 "blocked_amount": 0.0,
                 "avg_risk_score": 0.0,
+                "windows": self.windows.summary(),
             }
         return {
             "total_transactions": total,
@@ -135,17 +305,27 @@ class TransactionStreamer:
             "blocked_amount": round(self.blocked_amount, 2),
             "avg_risk_score": round(self._risk_score_sum / total, 4),
             "risk_distribution": dict(self.risk_counts),
+            "windows": self.windows.summary(),
         }
 
-    def get_buffered(self, since_id: int = 0, limit: int = 20) -> list[dict]:
-        """Get buffered transactions for HTTP polling fallback."""
-        filtered = [t for t in self.buffer if t["id"] > since_id]
-        return filtered[-limit:]
+    def get_model_quality(self) -> dict:
+        """Live confusion matrix, precision/recall/F1 and PR-AUC per detector."""
+        return self.quality.summary()
+
+    def get_drift_report(self) -> dict | None:
+        """Latest drift evaluation (None before the first one)."""
+        return self.drift.report if self.drift is not None else None
+
+    def get_buffered(self, since_id: int = 0, limit: int = 20, tail: bool = False) -> dict:
+        """Page of buffered transactions for the HTTP polling fallback."""
+        return self.buffer.since(since_id, limit, tail)
+
+    def stream_batches(self):
+        """Async generator of transaction batches, paced by the replay engine."""
+        return self.replay.batches(self)
 
     async def stream_generator(self):
         """Async generator for WebSocket streaming."""
-        while True:
-            tx = self.get_next_transaction()
-            yield tx
-            # Random delay between 0.5s and 2s for realistic feel
-            await asyncio.sleep(random.uniform(0.5, 2.0))
+        async for batch in self.stream_batches():
+            for tx in batch:
+                yield tx
@@ -0,0 +1,105 @@
+"""
+Wire Encoding Service.
+Encodes live transactions for /ws/transactions. Clients choose the
+encoding with the `encoding` query parameter:
+
+  json        (default) one JSON object per text frame — the original format
+  json-batch  a JSON array of transactions per text frame
+  binary      fixed-layout little-endian records per binary frame, with
+              labels, risk levels and feature names sent as enum codes
+
+Batched encodings carry every transaction already queued for the client
+(up to WS_BATCH_MAX), so frames stay one-per-transaction at low feed
+rates and grow as the rate rises. Each transaction is encoded once and
+the bytes are shared by every subscriber.
+
+Binary frame layout:
+  header   version u8 | count u16
+  record   id i64 | df_idx u32 | time f64 | amount f64 | combined_confidence f64 |
+           is_fraud i8 | risk_level u8 | recommendation u8 | flags u8 |
+           n_top u8 | n_top x (feature u8 | value f64 | shap_value f64)
+flags bit 0 is if_label == "fraud", bit 1 is ae_label == "fraud".
+"""
+
+import os
+import json
+import struct
+from services.metrics import REGISTRY
+from services.predictor import RISK_LEVELS
+from services.preprocessing import FEATURE_NAMES
+
+# Most transactions packed into one batched frame
+WS_BATCH_MAX = int(os.getenv("WS_BATCH_MAX") or 64)
+
+ENCODINGS = ("json", "json-batch", "binary")
+
+WIRE_VERSION = 1
+FRAME_HEADER = struct.Struct("<BH")
+RECORD = struct.Struct("<qIdddbBBBB")
+TOP_FEATURE = struct.Struct("<Bdd")
+
+# Enum codes shared with frontend/src/lib/wire.ts — append only
+RISK_CODES = {level: i for i, level in enumerate(RISK_LEVELS.tolist())}
+RECOMMENDATION_CODES = {"ALLOW": 0, "REVIEW": 1, "BLOCK": 2}
+FEATURE_CODES = {name: i for i, name in enumerate(FEATURE_NAMES)}
+IF_FRAUD = 1
+AE_FRAUD = 2
+
+# Encoded transactions kept for the other subscribers of the same feed
+CACHE_SIZE = 1024
+
+WS_FRAMES = REGISTRY.counter(
+    "fraudpulse_ws_frames_total", "WebSocket frames sent on the live feed", labels=("encoding",),
+)
+WS_BYTES = REGISTRY.counter(
+    "fraudpulse_ws_bytes_total", "WebSocket payload bytes sent on the live feed", labels=("encoding",),
+)
+WS_TRANSACTIONS = REGISTRY.counter(
+    "fraudpulse_ws_transactions_total", "Transactions delivered over WebSocket", labels=("encoding",),
+)
+
+
+def encode_record(tx: dict) -> bytes:
+    flags = (IF_FRAUD if tx["if_label"] == "fraud" else 0) | (AE_FRAUD if tx["ae_label"] == "fraud" else 0)
+    top = tx.get("top_features") or ()
+    parts = [RECORD.pack(
+        tx["id"], tx["df_idx"], tx["time"], tx["amount"], tx["combined_confidence"],
+        tx["is_fraud"], RISK_CODES[tx["risk_level"]], RECOMMENDATION_CODES[tx["recommendation"]],
+        flags, len(top),
+    )]
+    for f in top:
+        parts.append(TOP_FEATURE.pack(FEATURE_CODES[f["feature"]], f["value"], f["shap_value"]))
+    return b"".join(parts)
+
+
+class WireEncoder:
+    """Per-transaction encode cache shared by all WebSocket subscribers."""
+
+    def __init__(self, max_size: int = CACHE_SIZE):
+        self.max_size = max_size
+        self._json: dict[int, str] = {}
+        self._binary: dict[int, bytes] = {}
+
+    @staticmethod
+    def _cached(cache: dict, tx: dict, encode, max_size: int):
+        key = tx["id"]
+        value = cache.get(key)
+        if value is None:
+            value = cache[key] = encode(tx)
+            if len(cache) > max_size:
+                del cache[next(iter(cache))]  # oldest first: the feed is ordered by id
+        return value
+
+    def json(self, tx: dict) -> str:
+        return self._cached(self._json, tx, lambda t: json.dumps(t, separators=(",", ":")), self.max_size)
+
+    def binary(self, tx: dict) -> bytes:
+        return self._cached(self._binary, tx, encode_record, self.max_size)
+
+    def frame(self, txs: list[dict], encoding: str) -> str | bytes:
+        """One WebSocket frame for `txs` (a single transaction for plain json)."""
+        if encoding == "binary":
+            return FRAME_HEADER.pack(WIRE_VERSION, len(txs)) + b"".join(self.binary(tx) for tx in txs)
+        if encoding == "json-batch":
+            return "[" + ",".join(self.json(tx) for tx in txs) + "]"
+        return self.json(txs[0])
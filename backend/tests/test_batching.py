@@ -0,0 +1,49 @@
+"""MicroBatcher: per-row results from batched calls, and stop() under load."""
+
+import asyncio
+
+import numpy as np
+
+from services.batching import MicroBatcher
+
+
+def test_rows_are_batched_and_answered_individually():
+    calls = []
+
+    async def batch_fn(X):
+        calls.append(len(X))
+        return [float(row.sum()) for row in X]
+
+    async def scenario():
+        batcher = MicroBatcher(batch_fn, max_batch=8, max_wait=0.01)
+        results = await asyncio.gather(*[batcher.submit(np.full(3, i, dtype=float)) for i in range(20)])
+        await batcher.stop()
+        return results
+
+    assert asyncio.run(scenario()) == [3.0 * i for i in range(20)]
+    assert sum(calls) == 20
+    assert max(calls) <= 8 and len(calls) < 20
+
+
+def test_stop_returns_under_load():
+    async def batch_fn(X):
+        await asyncio.sleep(0)
+        return list(X)
+
+    async def client(batcher):
+        while True:
+            await batcher.submit(np.zeros(2))
+
+    async def scenario():
+        for _ in range(20):
+            batcher = MicroBatcher(batch_fn, max_batch=4, max_wait=0.001)
+            clients = [asyncio.create_task(client(batcher)) for _ in range(16)]
+            await asyncio.sleep(0.02)
+            # A swallowed cancellation would leave the batcher running and this wait hanging
+            await asyncio.wait_for(batcher.stop(), 2.0)
+            assert batcher._task is None
+            for task in clients:
+                task.cancel()
+            await asyncio.gather(*clients, return_exceptions=True)
+
+    asyncio.run(scenario())
@@ -0,0 +1,43 @@
+"""FlatIsolationForest parity with sklearn's IsolationForest."""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+
+from services.forest import FlatIsolationForest
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    train = rng.normal(size=(600, 6))
+    # Held-out rows, a few far outside the training cloud
+    test = np.vstack([rng.normal(size=(200, 6)), rng.normal(6.0, 1.0, size=(20, 6))])
+    return train, test
+
+
+@pytest.mark.parametrize("max_features", [1.0, 0.5])
+def test_scores_match_sklearn_after_save_and_load(data, tmp_path, max_features):
+    train, test = data
+    model = IsolationForest(n_estimators=50, max_samples=128, max_features=max_features, random_state=0).fit(train)
+    flat = FlatIsolationForest(model)
+    flat.save(tmp_path / "forest")
+    loaded = FlatIsolationForest.load(tmp_path / "forest")
+
+    for forest in (flat, loaded):
+        np.testing.assert_allclose(forest.score_samples(test), model.score_samples(test), rtol=0, atol=1e-12)
+        np.testing.assert_allclose(forest.decision_function(test), model.decision_function(test), rtol=0, atol=1e-12)
+    assert np.array_equal(loaded.decision_function(test) < 0, model.predict(test) == -1)
+
+
+def test_path_contributions_add_up_to_mean_path_length(data):
+    train, test = data
+    model = IsolationForest(n_estimators=50, max_samples=128, random_state=0).fit(train)
+    flat = FlatIsolationForest(model)
+
+    contributions = flat.path_contributions(test)
+    assert contributions.shape == test.shape
+    mean_path = -np.log2(-model.score_samples(test)) * flat.denominator / len(flat.roots)
+    np.testing.assert_allclose(flat.expected_value + contributions.sum(axis=1), mean_path, rtol=1e-9)
+    # The injected outliers have shorter paths than an average training row
+    assert (contributions[-20:].sum(axis=1) < 0).all()
@@ -0,0 +1,73 @@
+"""Quantile sketch accuracy and rolling-window expiry of services.live_stats."""
+
+import numpy as np
+
+from services.live_stats import LiveWindows, QuantileSketch, QUANTILES
+
+
+def test_sketch_quantiles_within_relative_accuracy():
+    rng = np.random.default_rng(1)
+    values = np.concatenate([rng.lognormal(3.0, 1.5, 20000), np.zeros(300)])
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for chunk in np.array_split(values, 7):
+        sketch.add_many(chunk)
+
+    qs = {"p10": 0.1, **QUANTILES, "p999": 0.999}
+    estimates = sketch.quantiles(qs)
+    for name, q in qs.items():
+        exact = np.quantile(values, q, method="lower")
+        assert abs(estimates[name] - exact) <= 0.01 * exact + 1e-4, name
+    assert sketch.quantiles({"p01": 0.001})["p01"] == 0.0  # the zeros
+
+
+def test_sketch_merge_and_subtract():
+    rng = np.random.default_rng(2)
+    a, b = QuantileSketch(), QuantileSketch()
+    a.add_many(rng.uniform(1, 100, 1000))
+    b.add_many(rng.uniform(500, 1000, 1000))
+    total = QuantileSketch()
+    total.merge(a)
+    total.merge(b)
+    assert total.count == 2000
+    total.merge(b, -1)
+    assert total.bins == a.bins and total.count == a.count
+
+
+def batch(windows: LiveWindows, n: int, amount: float, level: str = "LOW"):
+    windows.add_batch(
+        np.array([level] * n), np.array(["ALLOW"] * n), np.full(n, 0.1), np.full(n, amount), np.zeros(n),
+    )
+
+
+def test_windows_expire_bucket_by_bucket():
+    now = [0.0]
+    # 60 s window in six 10 s buckets, and a 30 s one
+    windows = LiveWindows("1m,30s", n_buckets=6, clock=lambda: now[0])
+
+    batch(windows, 10, amount=5.0)
+    now[0] = 35.0
+    batch(windows, 4, amount=500.0, level="HIGH")
+
+    summary = windows.summary()
+    assert summary["1m"]["total_transactions"] == 14
+    assert summary["30s"]["total_transactions"] == 4
+    assert summary["1m"]["risk_distribution"]["HIGH"] == 4
+
+    now[0] = 59.9
+    assert windows.summary()["1m"]["total_transactions"] == 14
+    now[0] = 60.0  # the t=0 bucket slides out
+    summary = windows.summary()["1m"]
+    assert summary["total_transactions"] == 4
+    assert abs(summary["amount_quantiles"]["p50"] - 500.0) <= 0.01 * 500.0
+    now[0] = 100.0  # and so does the t=35 one
+    summary = windows.summary()["1m"]
+    assert summary["total_transactions"] == 0 and summary["amount_quantiles"] is None
+
+
+def test_windows_clear_after_long_idle():
+    now = [0.0]
+    windows = LiveWindows("1m", n_buckets=6, clock=lambda: now[0])
+    batch(windows, 10, amount=5.0)
+    now[0] = 10_000.0
+    batch(windows, 3, amount=5.0)
+    assert windows.summary()["1m"]["total_transactions"] == 3
@@ -0,0 +1,100 @@
+"""ExplanationBroker against a fake Gemini client: single flight and cache hits."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from services.llm_cache import ExplanationBroker
+from services.llm_service import set_client
+
+TRANSACTION = {
+    "id": 42,
+    "amount": 129.99,
+    "if_score": 0.71,
+    "ae_reconstruction_error": 0.052,
+    "if_label": "fraud",
+    "ae_label": "fraud",
+    "combined_confidence": 0.83,
+    "risk_level": "CRITICAL",
+    "recommendation": "BLOCK",
+}
+SHAP_TOP5 = [{"feature": "V14", "value": -7.2, "shap_value": -0.31}]
+CHUNKS = ["1. Risk ", "Assessment", "\n..."]
+
+
+class FakeModels:
+    """Stands in for client.aio.models; streams CHUNKS once `release` is set."""
+
+    def __init__(self, fail: bool = False):
+        self.calls = 0
+        self.fail = fail
+        self.release = asyncio.Event()
+
+    async def generate_content_stream(self, model, contents, config):
+        self.calls += 1
+        return self._stream()
+
+    async def _stream(self):
+        await self.release.wait()
+        if self.fail:
+            raise RuntimeError("upstream unavailable")
+        for text in CHUNKS:
+            yield SimpleNamespace(text=text)
+
+
+@pytest.fixture
+def fake_models():
+    models = FakeModels()
+    set_client(SimpleNamespace(aio=SimpleNamespace(models=models)))
+    yield models
+    set_client(None)
+
+
+async def collect(broker: ExplanationBroker) -> str:
+    return "".join([chunk async for chunk in broker.stream(TRANSACTION, SHAP_TOP5)])
+
+
+def test_concurrent_requests_share_one_upstream_stream(fake_models):
+    async def scenario():
+        broker = ExplanationBroker()
+        readers = [asyncio.create_task(collect(broker)) for _ in range(3)]
+        # Hold the upstream until every reader has attached to the flight
+        while not broker.inflight or next(iter(broker.inflight.values())).readers < 3:
+            await asyncio.sleep(0)
+        fake_models.release.set()
+        return broker, await asyncio.gather(*readers)
+
+    broker, texts = asyncio.run(scenario())
+    assert texts == ["".join(CHUNKS)] * 3
+    assert fake_models.calls == 1
+    assert broker.stats()["upstream_calls"] == 1
+    assert broker.stats()["deduplicated"] == 2
+    assert broker.stats()["inflight"] == 0
+
+
+def test_repeat_request_is_served_from_cache(fake_models):
+    async def scenario():
+        broker = ExplanationBroker()
+        fake_models.release.set()
+        return broker, [await collect(broker), await collect(broker)]
+
+    broker, texts = asyncio.run(scenario())
+    assert texts[0] == texts[1] == "".join(CHUNKS)
+    assert fake_models.calls == 1
+    stats = broker.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+
+def test_failed_generation_is_not_cached(fake_models):
+    fake_models.fail = True
+
+    async def scenario():
+        broker = ExplanationBroker()
+        fake_models.release.set()
+        return broker, [await collect(broker), await collect(broker)]
+
+    broker, texts = asyncio.run(scenario())
+    assert all(text.startswith("[Analysis unavailable: upstream unavailable]") for text in texts)
+    assert fake_models.calls == 2
+    assert broker.stats()["size"] == 0
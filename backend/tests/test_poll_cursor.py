@@ -0,0 +1,79 @@
+"""Polling cursor contract of TransactionBuffer.since / /api/poll/transactions."""
+
+from fastapi.testclient import TestClient
+
+from services.streamer import TransactionBuffer
+
+
+def filled(capacity: int, count: int) -> TransactionBuffer:
+    buffer = TransactionBuffer(capacity)
+    for _ in range(count):
+        buffer.append({"id": buffer.next_id})
+    return buffer
+
+
+def ids(page: dict) -> list[int]:
+    return [tx["id"] for tx in page["transactions"]]
+
+
+def test_empty_ring():
+    page = TransactionBuffer(8).since(0, 5)
+    assert page == {"transactions": [], "next_since_id": 0, "gap": 0, "has_more": False, "reset": False}
+
+
+def test_pages_oldest_first_until_caught_up():
+    buffer = filled(8, 6)
+    page = buffer.since(0, 4)
+    assert ids(page) == [1, 2, 3, 4]
+    assert (page["next_since_id"], page["gap"], page["has_more"]) == (4, 0, True)
+    page = buffer.since(page["next_since_id"], 4)
+    assert ids(page) == [5, 6]
+    assert (page["next_since_id"], page["has_more"]) == (6, False)
+
+
+def test_cursor_older_than_ring_reports_gap():
+    buffer = filled(8, 20)  # ids 13..20 held; slots wrapped past capacity twice
+    assert buffer.first_id == 13
+    page = buffer.since(3, 5)
+    assert ids(page) == [13, 14, 15, 16, 17]
+    assert (page["next_since_id"], page["gap"], page["has_more"], page["reset"]) == (17, 9, True, False)
+
+
+def test_cursor_exactly_at_tail():
+    buffer = filled(8, 20)
+    page = buffer.since(20, 5)
+    assert page == {"transactions": [], "next_since_id": 20, "gap": 0, "has_more": False, "reset": False}
+
+
+def test_cursor_ahead_of_tail_resets_to_newest():
+    buffer = filled(8, 20)
+    page = buffer.since(500, 3)
+    assert ids(page) == [18, 19, 20]
+    assert page["reset"] and page["next_since_id"] == 20
+    # The reset cursor then follows the feed normally
+    buffer.append({"id": buffer.next_id})
+    assert ids(buffer.since(page["next_since_id"], 3)) == [21]
+
+
+def test_tail_skips_to_newest_rows():
+    buffer = filled(8, 20)
+    page = buffer.since(0, 3, tail=True)
+    assert ids(page) == [18, 19, 20]
+    assert (page["next_since_id"], page["gap"], page["has_more"]) == (20, 17, False)
+
+
+def test_poll_endpoint_returns_page(monkeypatch):
+    import main
+
+    class Source:
+        buffer = filled(8, 20)
+
+        def get_buffered(self, since_id=0, limit=20, tail=False):
+            return self.buffer.since(since_id, limit, tail)
+
+    monkeypatch.setattr(main, "stream_source", Source())
+    client = TestClient(main.app)  # no lifespan: only the polling route is exercised
+    body = client.get("/api/poll/transactions", params={"since_id": 10, "limit": 2}).json()
+    assert ids(body) == [13, 14]
+    assert (body["next_since_id"], body["gap"], body["has_more"], body["reset"]) == (14, 2, True, False)
+    assert client.get("/api/poll/transactions", params={"since_id": -1}).status_code == 422
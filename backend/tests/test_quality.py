@@ -0,0 +1,72 @@
+"""Live detector quality vs sklearn.metrics on a small labelled stream."""
+
+import numpy as np
+import pytest
+from sklearn.metrics import average_precision_score, confusion_matrix, precision_recall_fscore_support
+
+from services.quality import QUALITY_BINS, QualityTracker
+
+AE_THRESHOLD = 0.05
+
+
+@pytest.fixture(scope="module")
+def stream():
+    rng = np.random.default_rng(3)
+    n = 4000
+    actual = (rng.random(n) < 0.1).astype(np.int64)
+    # Fraud rows score higher on average, with plenty of overlap
+    if_score = np.clip(rng.beta(2, 5, n) + 0.3 * actual, 0, 1).round(4)
+    ae_error = (rng.gamma(2.0, 0.02, n) * (1 + 2 * actual)).round(6)
+    combined = np.clip(0.5 * if_score + 0.5 * np.minimum(1, ae_error / (2 * AE_THRESHOLD)), 0, 1).round(4)
+    risk_level = np.array(["LOW", "MEDIUM", "HIGH", "CRITICAL"])[np.searchsorted([0.3, 0.5, 0.7], combined, "right")]
+    predictions = {
+        "if_score": if_score,
+        "if_label": np.where(if_score > 0.5, "fraud", "legitimate"),
+        "ae_reconstruction_error": ae_error,
+        "ae_label": np.where(ae_error > AE_THRESHOLD, "fraud", "legitimate"),
+        "combined_confidence": combined,
+        "risk_level": risk_level,
+    }
+    tracker = QualityTracker(AE_THRESHOLD)
+    for part in np.array_split(np.arange(n), 9):
+        tracker.add_batch({key: values[part] for key, values in predictions.items()}, actual[part])
+
+    scores = {
+        "isolation_forest": (if_score, predictions["if_label"] == "fraud"),
+        "autoencoder": (ae_error / (ae_error + AE_THRESHOLD), predictions["ae_label"] == "fraud"),
+        "combined": (combined, (risk_level == "HIGH") | (risk_level == "CRITICAL")),
+    }
+    return tracker.summary(), actual, scores
+
+
+@pytest.mark.parametrize("model", ["isolation_forest", "autoencoder", "combined"])
+def test_confusion_matrix_and_rates_match_sklearn(stream, model):
+    summary, actual, scores = stream
+    report = summary["models"][model]
+    flagged = scores[model][1]
+
+    tn, fp, fn, tp = confusion_matrix(actual, flagged).ravel()
+    assert report["confusion_matrix"] == {"tp": tp, "fp": fp, "tn": tn, "fn": fn}
+    precision, recall, f1, _ = precision_recall_fscore_support(actual, flagged, average="binary", zero_division=0)
+    assert report["precision"] == pytest.approx(precision, abs=1e-4)
+    assert report["recall"] == pytest.approx(recall, abs=1e-4)
+    assert report["f1"] == pytest.approx(f1, abs=1e-4)
+
+
+@pytest.mark.parametrize("model", ["isolation_forest", "autoencoder", "combined"])
+def test_pr_auc_matches_sklearn_at_histogram_resolution(stream, model):
+    summary, actual, scores = stream
+    score = scores[model][0]
+    pr_auc = summary["models"][model]["pr_auc"]
+
+    # Scores sharing a bin are ties to the histogram; with the same ties sklearn agrees exactly
+    binned = np.clip((score * QUALITY_BINS).astype(np.int64), 0, QUALITY_BINS - 1)
+    assert pr_auc == pytest.approx(average_precision_score(actual, binned), abs=1e-4)
+    # And against the raw scores it is off by no more than the binning
+    assert pr_auc == pytest.approx(average_precision_score(actual, score), abs=0.01)
+
+
+def test_totals(stream):
+    summary, actual, _ = stream
+    assert summary["total_transactions"] == len(actual)
+    assert summary["fraud_transactions"] == int(actual.sum())
@@ -0,0 +1,35 @@
+"""App shutdown with the SHAP precomputer tapping a busy live feed."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from services.dataset import find_source
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+# Runs the full lifespan in its own interpreter so a hung shutdown fails the test instead of pytest
+SCRIPT = """
+import time
+from fastapi.testclient import TestClient
+import main
+
+with TestClient(main.app):
+    time.sleep(2)
+    assert main.shap_precomputer is not None and main.shap_precomputer.precomputed > 0
+print("exited")
+"""
+
+
+@pytest.mark.skipif(find_source() is None, reason="needs a dataset in data/")
+def test_lifespan_exits_with_precompute_on():
+    env = {**os.environ, "SHAP_PRECOMPUTE": "1", "REPLAY_MODE": "rate", "REPLAY_TPS": "2000", "PYTHONPATH": str(BACKEND)}
+    for _ in range(3):
+        run = subprocess.run(
+            [sys.executable, "-c", SCRIPT], cwd=BACKEND, env=env, capture_output=True, text=True, timeout=120,
+        )
+        assert run.returncode == 0, run.stderr[-2000:]
+        assert "exited" in run.stdout
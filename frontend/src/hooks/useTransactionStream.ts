@@ -3,6 +3,7 @@
 import { useState, useEffect, useRef, useCallback } from "react";
 import { WS_URL } from "@/lib/constants";
 import { pollTransactions, StreamTransaction } from "@/lib/api";
+import { decodeFrame } from "@/lib/wire";
 
 type ConnectionMode = "ws" | "poll" | "connecting";
 
@@ -36,12 +37,12 @@ export function useTransactionStream(displayLimit: number = 50) {
 
         (async () => {
             try {
-                const data = await pollTransactions(0);
+                const data = await pollTransactions(0, 50, true);
+                latestIdRef.current = Math.max(latestIdRef.current, data.next_since_id);
                 if (data.transactions.length > 0) {
                     // Sort descending by id (newest first)
                     const sorted = [...data.transactions].sort((a, b) => b.id - a.id);
                     setAllTransactions(sorted);
-                    latestIdRef.current = sorted[0].id;
                 }
             } catch {
                 // Server not ready — will get data from WS/poll
@@ -53,7 +54,11 @@ export function useTransactionStream(displayLimit: number = 50) {
     const connectWebSocket = useCallback(() => {
         if (wsRef.current?.readyState === WebSocket.OPEN) return;
 
-        const ws = new WebSocket(WS_URL);
+        // Compact binary frames, batched by the server when the feed rate rises
+        const url = new URL(WS_URL);
+        url.searchParams.set("encoding", "binary");
+        const ws = new WebSocket(url);
+        ws.binaryType = "arraybuffer";
         wsRef.current = ws;
 
         ws.onopen = () => {
@@ -64,8 +69,9 @@ export function useTransactionStream(displayLimit: number = 50) {
 
         ws.onmessage = (event) => {
             try {
-                const tx = JSON.parse(event.data) as StreamTransaction;
-                addTransaction(tx);
+                for (const tx of decodeFrame(event.data as ArrayBuffer)) {
+                    addTransaction(tx);
+                }
             } catch (e) {
                 console.error("[WS] Parse error:", e);
             }
@@ -98,9 +104,12 @@ export function useTransactionStream(displayLimit: number = 50) {
         pollingRef.current = setInterval(async () => {
             try {
                 const data = await pollTransactions(latestIdRef.current);
+                if (data.gap > 0) console.warn(`[Poll] Missed ${data.gap} transactions`);
                 for (const tx of data.transactions) {
                     addTransaction(tx);
                 }
+                // Follow the server's cursor, which also moves back after a restart (reset)
+                latestIdRef.current = data.next_since_id;
             } catch (e) {
                 console.error("[Poll] Error:", e);
             }
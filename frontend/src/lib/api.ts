@@ -26,6 +26,7 @@ export interface StreamTransaction {
     recommendation: string;
     if_label: string;
     ae_label: string;
+    top_features?: ShapValue[];
 }
 
 export interface Stats {
@@ -36,6 +37,43 @@ export interface Stats {
     blocked_amount: number;
     avg_risk_score: number;
     risk_distribution?: Record<string, number>;
+    /** Rolling aggregates keyed by window ("1m", "5m", "1h") */
+    windows?: Record<string, WindowStats>;
+}
+
+export interface Quantiles {
+    p50: number;
+    p90: number;
+    p99: number;
+}
+
+export interface WindowStats {
+    window_seconds: number;
+    total_transactions: number;
+    transactions_per_second: number;
+    flagged_transactions: number;
+    fraud_rate: number;
+    model_accuracy: number;
+    blocked_amount: number;
+    avg_risk_score: number;
+    risk_distribution: Record<string, number>;
+    confidence_quantiles: Quantiles | null;
+    amount_quantiles: Quantiles | null;
+}
+
+export interface ModelQuality {
+    confusion_matrix: { tp: number; fp: number; tn: number; fn: number };
+    precision: number;
+    recall: number;
+    f1: number;
+    accuracy: number;
+    pr_auc: number | null;
+}
+
+export interface QualityStats {
+    total_transactions: number;
+    fraud_transactions: number;
+    models: Record<"isolation_forest" | "autoencoder" | "combined", ModelQuality>;
 }
 
 export interface ShapValue {
@@ -71,6 +109,34 @@ export async function fetchStats(): Promise<Stats> {
     return res.json();
 }
 
+export async function fetchModelQuality(): Promise<QualityStats> {
+    const res = await fetch(`${API_BASE}/api/stats/models`);
+    if (!res.ok) throw new Error("Failed to fetch model quality");
+    return res.json();
+}
+
+export interface DriftColumn {
+    psi: number;
+    ks: number;
+    status: "stable" | "moderate" | "significant";
+}
+
+export interface DriftReport {
+    status: "pending" | "warming_up" | "stable" | "moderate" | "significant";
+    rows: number;
+    evaluated_at?: number;
+    window_seconds?: number;
+    reference_rows?: number;
+    columns?: Record<string, DriftColumn>;
+    drifted?: string[];
+}
+
+export async function fetchDrift(): Promise<DriftReport> {
+    const res = await fetch(`${API_BASE}/api/drift`);
+    if (!res.ok) throw new Error("Failed to fetch drift report");
+    return res.json();
+}
+
 export async function fetchTransactions(page = 1, limit = 20): Promise<{
     transactions: Transaction[];
     page: number;
@@ -143,11 +209,19 @@ export async function* streamExplanation(id: number): AsyncGenerator<string> {
     }
 }
 
-export async function pollTransactions(sinceId: number = 0, limit: number = 50): Promise<{
+export interface PollPage {
     transactions: StreamTransaction[];
-    latest_id: number;
-}> {
-    const res = await fetch(`${API_BASE}/api/poll/transactions?since_id=${sinceId}&limit=${limit}`);
+    /** Cursor for the next poll */
+    next_since_id: number;
+    /** Transactions evicted (or skipped by tail) before this client read them */
+    gap: number;
+    has_more: boolean;
+    /** since_id predates a server restart; the page restarts at the newest rows */
+    reset: boolean;
+}
+
+export async function pollTransactions(sinceId: number = 0, limit: number = 50, tail: boolean = false): Promise<PollPage> {
+    const res = await fetch(`${API_BASE}/api/poll/transactions?since_id=${sinceId}&limit=${limit}&tail=${tail}`);
     if (!res.ok) throw new Error("Failed to poll transactions");
     return res.json();
 }
@@ -0,0 +1,56 @@
+import { StreamTransaction, ShapValue } from "./api";
+
+/*
+ * Decoder for the binary live-feed encoding (/ws/transactions?encoding=binary).
+ * Layout and enum codes mirror backend/services/wire.py.
+ */
+
+const WIRE_VERSION = 1;
+const RISK_LEVELS = ["LOW", "MEDIUM", "HIGH", "CRITICAL"];
+const RECOMMENDATIONS = ["ALLOW", "REVIEW", "BLOCK"];
+const FEATURE_NAMES = ["Time", ...Array.from({ length: 28 }, (_, i) => `V${i + 1}`), "Amount"];
+const IF_FRAUD = 1;
+const AE_FRAUD = 2;
+
+export function decodeFrame(buffer: ArrayBuffer): StreamTransaction[] {
+    const view = new DataView(buffer);
+    if (view.getUint8(0) !== WIRE_VERSION) {
+        throw new Error(`Unsupported wire version ${view.getUint8(0)}`);
+    }
+    const count = view.getUint16(1, true);
+    const txs: StreamTransaction[] = [];
+    let o = 3;
+
+    for (let n = 0; n < count; n++) {
+        const flags = view.getUint8(o + 39);
+        const nTop = view.getUint8(o + 40);
+        const tx: StreamTransaction = {
+            id: Number(view.getBigInt64(o, true)),
+            df_idx: view.getUint32(o + 8, true),
+            time: view.getFloat64(o + 12, true),
+            amount: view.getFloat64(o + 20, true),
+            combined_confidence: view.getFloat64(o + 28, true),
+            is_fraud: view.getInt8(o + 36),
+            risk_level: RISK_LEVELS[view.getUint8(o + 37)],
+            recommendation: RECOMMENDATIONS[view.getUint8(o + 38)],
+            if_label: flags & IF_FRAUD ? "fraud" : "legitimate",
+            ae_label: flags & AE_FRAUD ? "fraud" : "legitimate",
+        };
+        o += 41;
+
+        if (nTop > 0) {
+            const top: ShapValue[] = [];
+            for (let i = 0; i < nTop; i++) {
+                top.push({
+                    feature: FEATURE_NAMES[view.getUint8(o)],
+                    value: view.getFloat64(o + 1, true),
+                    shap_value: view.getFloat64(o + 9, true),
+                });
+                o += 17;
+            }
+            tx.top_features = top;
+        }
+        txs.push(tx);
+    }
+    return txs;
+}